@@ -1,13 +1,11 @@
 # core/asking_questions.py
 
-from integration.llm.gemini_api import GeminiAPI
+from integration.llm.registry import get_llm_client
 from agent.memory.data_handler import save_data
 from config import PROMPTS
 import json
 from datetime import datetime
 
-gemini_api = GeminiAPI()
-
 def complementary_questions(resume_content, file_name):
     """Analyzes resume sections and ask clarifying questions in order to build an enhanced resume version
     Args:resume_content (dict): Dictionary containing parsed resume sections
@@ -44,7 +42,7 @@ def complementary_questions(resume_content, file_name):
         }
     try:
         # Get clarifying questions from Gemini - the response will be in JSON format
-        questions_response = gemini_api.generate_content(formatted_prompt)
+        questions_response = get_llm_client().generate_content(formatted_prompt)
     except Exception as e:
         print(f"Error generating complementary questions: {e}")
 
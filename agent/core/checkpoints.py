@@ -0,0 +1,52 @@
+# agent/core/checkpoints.py
+# Purpose: Persist the output of each stage of the resume pipeline so a retry starts from the failed stage
+# instead of parsing the PDF and calling the LLM again.
+from agent.memory.user_db.users import load_checkpoint, save_checkpoint
+
+# Pipeline stages in order, with the checkpoint fields each one produces
+TEXT_EXTRACTED = "text_extracted"                # text, segmented_sections, headings_found
+SECTIONS_EXTRACTED = "sections_extracted"        # extracted_data, feedback (fused mode / duplicate upload)
+RAW_PROCESSED = "raw_processed"                  # resume_id
+FEEDBACK_GENERATED = "feedback_generated"        # feedback
+GOOGLE_DOC_CREATED = "google_doc_created"        # google_doc_url, llm_feedback_id
+COMPLETED = "completed"                          # llm_feedback_id saved in Firestore
+
+STAGES = [TEXT_EXTRACTED, SECTIONS_EXTRACTED, RAW_PROCESSED, FEEDBACK_GENERATED, GOOGLE_DOC_CREATED, COMPLETED]
+
+
+class ResumeCheckpoint:
+    """Stage outputs of one upload, keyed by user and PDF fingerprint so every retry of the same upload finds them."""
+
+    def __init__(self, user_id: str, pdf_sha256: str, data: dict | None = None):
+        self.user_id = user_id
+        self.pdf_sha256 = pdf_sha256
+        self.checkpoint_id = f"{user_id}_{pdf_sha256}"
+        self.data = data or {}
+
+    @classmethod
+    async def load(cls, user_id: str, pdf_sha256: str) -> "ResumeCheckpoint":
+        checkpoint = cls(user_id, pdf_sha256)
+        checkpoint.data = await load_checkpoint(checkpoint.checkpoint_id) or {}
+        if checkpoint.stage:
+            print(f"⏩ Checkpoint encontrado para el usuario {user_id}: última etapa completada '{checkpoint.stage}'")
+        return checkpoint
+
+    @property
+    def stage(self) -> str | None:
+        """Last completed stage, or None if nothing was completed yet."""
+        return self.data.get("stage")
+
+    def done(self, stage: str) -> bool:
+        return self.stage is not None and STAGES.index(self.stage) >= STAGES.index(stage)
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    async def save(self, stage: str, **outputs):
+        """Records `stage` as completed together with its outputs. A failed save only costs the reuse on retry."""
+        self.data.update(outputs)
+        self.data["stage"] = stage
+        try:
+            await save_checkpoint(self.checkpoint_id, {"user_id": self.user_id, "pdf_sha256": self.pdf_sha256, "stage": stage, **outputs})
+        except Exception as e:
+            print(f"No se pudo guardar el checkpoint '{stage}' del usuario {self.user_id}: {e}")
@@ -0,0 +1,99 @@
+# agent/core/dag.py
+# Purpose: Minimal async DAG executor: runs each stage as soon as the stages it depends on are done, so independent
+# I/O (uploads, Firestore reads, LLM calls) overlaps, and reports the critical path that set the wall-clock time.
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+
+@dataclass
+class StageTiming:
+    name: str
+    deps: tuple[str, ...]
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class DAGRun:
+    """Results and timings of one execution."""
+    results: dict = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return self.finished_at - self.started_at
+
+    def critical_path(self) -> list[StageTiming]:
+        """The chain of stages that ends last, following at each step the dependency that finished last."""
+        finished = [timing for timing in self.timings.values() if timing.finished_at]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda timing: timing.finished_at)]
+        while path[-1].deps:
+            path.append(max((self.timings[dep] for dep in path[-1].deps), key=lambda timing: timing.finished_at))
+        return path[::-1]
+
+    def report(self) -> str:
+        path = " → ".join(f"{timing.name} ({timing.seconds:.2f}s)" for timing in self.critical_path())
+        stages_total = sum(timing.seconds for timing in self.timings.values())
+        return f"total {self.seconds:.2f}s (suma de etapas {stages_total:.2f}s); ruta crítica: {path}"
+
+
+class DAG:
+    """Stages are async callables that receive the results of their dependencies as keyword arguments.
+
+        dag = DAG()
+        dag.add("lookup", lookup_resume_id)
+        dag.add("upload", upload_pdf, deps=["lookup"])    # called as upload_pdf(lookup=<result>)
+        run = await dag.run()
+
+    If a stage raises, the stages still running are cancelled and the exception propagates from run().
+    """
+
+    def __init__(self):
+        self._stages: dict[str, tuple[Callable[..., Awaitable], tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable], deps: list[str] | tuple[str, ...] = ()):
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(missing)}")
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        self._stages[name] = (func, tuple(deps))
+
+    async def run(self) -> DAGRun:
+        dag_run = DAGRun(started_at=time.perf_counter())
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str, func, deps: tuple[str, ...]):
+            dep_results = {dep: await tasks[dep] for dep in deps}
+            timing = dag_run.timings[name]
+            timing.started_at = time.perf_counter()
+            result = await func(**dep_results)
+            timing.finished_at = time.perf_counter()
+            dag_run.results[name] = result
+            return result
+
+        for name, (func, deps) in self._stages.items():
+            dag_run.timings[name] = StageTiming(name=name, deps=deps)
+            tasks[name] = asyncio.create_task(run_stage(name, func, deps), name=name)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            dag_run.finished_at = time.perf_counter()
+        return dag_run
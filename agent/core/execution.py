@@ -2,15 +2,22 @@
 # Import necessary functions from other modules
 
 #agent/core/execution.py
+import asyncio
 from fastapi import HTTPException
-from agent.tools.information_extraction import get_resume_text_from_pdf, extract_information
-from agent.memory.user_db.users import add_resume_version, fetch_resume_data
-from agent.tools.general_feedback import generate_llm_feedback
+from agent.tools.information_extraction import aextract_information, aextract_segmented_information, merge_extracted_sections, empty_resume_sections
+from agent.tools.rule_based_extraction import extract_rule_based_sections
+from agent.tools.layout_extraction import SegmentedResume, format_segmented_text
+from agent.tools.pdf_extraction_service import get_pdf_extraction_service
+from agent.tools.resume_fingerprint import pdf_fingerprint, text_fingerprint
+from agent.memory.user_db.users import add_resume_version, fetch_resume_data, find_processed_duplicate, save_resume_fingerprints, add_to_review_queue, get_document, invalidate_document
+from agent.tools.general_feedback import generate_llm_feedback, aextract_and_analyze
 from googleapiclient.errors import HttpError
 from google.cloud import firestore
 from agent.memory.user_db.users import db
-from config import USERS_COLLECTION, UUID_COLLECTION, RESUME_COLLECTION, HR_COLLECTION, SECTIONS_COLLECTION, llm_feedback_metadata_template
-from agent.tools.google_doc import create_google_doc
+from config import USERS_COLLECTION, UUID_COLLECTION, RESUME_COLLECTION, HR_COLLECTION, SECTIONS_COLLECTION, LLM_MODEL_NAME, RESUME_PIPELINE_MODE, PDF_EXTRACTION_MODE, DUPLICATE_DETECTION_ENABLED, llm_feedback_metadata_template
+from agent.tools.google_doc import create_google_doc, FeedbackDocBuilder
+from agent.core.dag import DAG
+from agent.core.checkpoints import ResumeCheckpoint, TEXT_EXTRACTED, SECTIONS_EXTRACTED, RAW_PROCESSED, FEEDBACK_GENERATED, GOOGLE_DOC_CREATED, COMPLETED
 from google.cloud import storage
 
 
@@ -18,27 +25,56 @@ class ResumeFeedbackOrchestrator:
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.state = {"stage": "initialized"}
+        self.checkpoint = None
     
-    async def process_raw_resume(self, pdf_bytes: bytes):
-        # Extract text and store in Firestore
-        success, resume_id= await raw_resume_processing(pdf_bytes, self.user_id)
+    async def process_raw_resume(self, pdf: bytes | str, pipeline_mode: str = RESUME_PIPELINE_MODE):
+        """Processes an uploaded resume, given as bytes or as the path of a spooled upload.
+        Stage outputs are checkpointed, so processing the same upload again resumes after the last completed stage."""
+        self.checkpoint = await ResumeCheckpoint.load(self.user_id, await asyncio.to_thread(pdf_fingerprint, pdf))
+        if self.checkpoint.done(COMPLETED):
+            self.state["stage"] = "llm_feedback_generated"
+            return True
+
+        if self.checkpoint.done(RAW_PROCESSED):
+            success, resume_id, feedback = True, self.checkpoint.get("resume_id"), self.checkpoint.get("feedback")
+        else:
+            # Extract text and store in Firestore (in fused mode, or for a duplicate upload, the feedback comes back already generated)
+            success, resume_id, feedback = await raw_resume_processing(pdf, self.user_id, pipeline_mode, checkpoint=self.checkpoint)
         if success and resume_id:
             self.state["stage"] = "raw_processed"
-            await self.generate_llm_feedback(resume_id)
+            try:
+                await self.generate_llm_feedback(resume_id, feedback=feedback)
+            except FeedbackFailed as e:
+                # Not marked COMPLETED: the next attempt resumes from the last checkpointed stage
+                print(f"Feedback del usuario {self.user_id} incompleto (etapa: {self.state['stage']}): {e}")
+                return False
         return success
     
-    async def generate_llm_feedback(self, resume_id: str):
+    async def generate_llm_feedback(self, resume_id: str, feedback: dict | None = None):
         self.state["stage"] = "generating_llm_feedback"
-        # Get resume data from Firestore
-        resume_data = await fetch_resume_data(self.user_id, resume_id)
-
-        # Generate LLM feedback
-        feedback = await generate_llm_feedback(resume_data)
-        # Store feedback in Firestore
-        resume_ref = db.collection(RESUME_COLLECTION).document(resume_id)
-        doc = await resume_ref.get()
+        checkpoint = self.checkpoint
+        doc_builder = FeedbackDocBuilder()
+        if feedback is not None and "error" in feedback:
+            feedback = None  # A failed fused analysis: generate the feedback on its own
+        if feedback is None and checkpoint is not None and checkpoint.done(FEEDBACK_GENERATED):
+            feedback = checkpoint.get("feedback")
+        if feedback is None:
+            # Get resume data from Firestore
+            resume_data = await fetch_resume_data(self.user_id, resume_id)
 
-        doc_dic = doc.to_dict()
+            # Generate LLM feedback; Docs requests are built section by section while the response streams in
+            feedback = await generate_llm_feedback(resume_data, on_section=doc_builder.add_section)
+            if checkpoint is not None and "error" not in feedback:
+                await checkpoint.save(FEEDBACK_GENERATED, feedback=feedback)
+        else:
+            # Feedback already produced by the fused extraction call, reused from a duplicate upload or from a checkpoint
+            for section_key, section_value in feedback.items():
+                doc_builder.add_section(section_key, section_value)
+        if "error" in feedback:
+            self.state["stage"] = "llm_feedback_failed"
+            raise FeedbackFailed(f"Feedback generation failed: {feedback['error']}")
+        # Store feedback in Firestore (the resume document was usually just read above, so this comes from the cache)
+        doc_dic = await fetch_resume_data(self.user_id, resume_id)
         print(f"Estes es el contenido del documento:\n{doc_dic}")
 
         user_id = doc_dic.get("metadata", {}).get("user_id")  # Access the field using .get() on the snapshot
@@ -47,29 +83,34 @@ class ResumeFeedbackOrchestrator:
 
         print(f"Este es el id del usuario: {user_id}")
 
-        llm_resume_ref = db.collection(RESUME_COLLECTION).document()
+        # A retry reuses the feedback document id and Google Doc of the earlier attempt
+        if checkpoint is not None and checkpoint.done(GOOGLE_DOC_CREATED):
+            llm_resume_ref = db.collection(RESUME_COLLECTION).document(checkpoint.get("llm_feedback_id"))
+        else:
+            llm_resume_ref = db.collection(RESUME_COLLECTION).document()
         llm_feedback_id = llm_resume_ref.id
 
         print(f"Este es el id del feedback: {llm_feedback_id}")
         print(f"Este es el id del CV del usuario: {resume_id}")
 
-        llm_feedback_doc_url = await create_google_doc(self.user_id, feedback, "Reporte_de_retroalimentación_v1")
-
-        if llm_feedback_doc_url:
-            print(f"Google Doc created successfully: {llm_feedback_doc_url}")
-            # Optional: Store the URL, perhaps update Firestore record
-            self.state["stage"] = "google_doc_created" # Update state if needed
-            # You might want to add the URL to the feedback dict or save it separately
-            # feedback['google_doc_url'] = llm_feedback_doc_url # Example
+        if checkpoint is not None and checkpoint.done(GOOGLE_DOC_CREATED):
+            llm_feedback_doc_url = checkpoint.get("google_doc_url")
         else:
-            print(f"Failed to create Google Doc for user {self.user_id}, resume_id {llm_feedback_id}")
-            self.state["stage"] = "google_doc_failed" # Update state if needed
-            # Decide how to handle failure - maybe log and continue, or raise error
+            llm_feedback_doc_url = await create_google_doc(self.user_id, feedback, "Reporte_de_retroalimentación_v1", doc_requests=doc_builder.finish())
+            if llm_feedback_doc_url and checkpoint is not None:
+                await checkpoint.save(GOOGLE_DOC_CREATED, google_doc_url=llm_feedback_doc_url, llm_feedback_id=llm_feedback_id)
+
+        if not llm_feedback_doc_url:
+            # Nothing is stored or queued for review without the document HR edits
+            self.state["stage"] = "google_doc_failed"
+            raise FeedbackFailed(f"Could not create the Google Doc for user {self.user_id}, resume_id {llm_feedback_id}")
+        print(f"Google Doc created successfully: {llm_feedback_doc_url}")
+        self.state["stage"] = "google_doc_created"
         
         feedback_metadata = llm_feedback_metadata_template.copy() # Start with a copy of the template
         feedback_metadata["status"] = "pendiente"
         feedback_metadata["version_type"] = "llm_feedback"
-        feedback_metadata["model_info"] = "gemini-2.0-flash-thinking-exp-01-21"
+        feedback_metadata["model_info"] = LLM_MODEL_NAME
         feedback_metadata["user_id"] = user_id
         feedback_metadata["resume_id"] = llm_feedback_id
         feedback_metadata["created_at"] = firestore.SERVER_TIMESTAMP
@@ -83,11 +124,22 @@ class ResumeFeedbackOrchestrator:
         }
 
         await llm_resume_ref.set(llm_resume_feedback_metadata)
+        invalidate_document(RESUME_COLLECTION, llm_feedback_id)
+        await add_to_review_queue(llm_feedback_id, feedback_metadata)
         self.state["stage"] = "llm_feedback_generated"
 
         user_ref = db.collection(USERS_COLLECTION).document(user_id)
         await user_ref.update({"llm_feedback_id": llm_feedback_id})
+        invalidate_document(USERS_COLLECTION, user_id)
+
+        # Index the fingerprints so a later upload of the same resume reuses this extraction and feedback
+        resume_metadata = doc_dic.get("metadata", {})
+        fingerprints = resume_metadata.get("fingerprints")
+        if DUPLICATE_DETECTION_ENABLED and fingerprints and not resume_metadata.get("duplicate_of"):
+            await save_resume_fingerprints(fingerprints, resume_id, llm_feedback_id, user_id)
 
+        if checkpoint is not None:
+            await checkpoint.save(COMPLETED, llm_feedback_id=llm_feedback_id)
         return feedback
 
 
@@ -99,63 +151,195 @@ class ResumeFeedbackOrchestrator:
         return True
 """
     
-async def raw_resume_processing(pdf_bytes: bytes, uid: str):
-    """Main execution flow for a single uploaded file"""
+async def save_partial_extraction(uid: str, local_data: dict):
+    """Stores the locally extracted fields (contact details, languages) when the LLM extraction fails,
+    so the candidate's contact data is available even without the rest of the resume."""
     try:
-        # 1. Extract text
-        text = get_resume_text_from_pdf(pdf_bytes)
-        if not text:
-            print(f"Empty text extracted for user {uid}")
-            return False, None
-        
+        resume_id = (await get_document(USERS_COLLECTION, uid) or {}).get("user_resume_id")
+        await db.collection(RESUME_COLLECTION).document(resume_id).update({
+            "content": merge_extracted_sections(empty_resume_sections(), local_data),
+            "metadata.status": "llm_extraction_failed",
+            "metadata.last_updated": firestore.SERVER_TIMESTAMP,
+        })
+        invalidate_document(RESUME_COLLECTION, resume_id)
+        print(f"Datos de contacto extraídos localmente guardados para el usuario: {uid}")
+    except Exception as e:
+        print(f"No se pudieron guardar los datos extraídos localmente para el usuario {uid}: {e}")
+
+async def extract_resume_sections(pdf: bytes | str, uid: str, pipeline_mode: str, checkpoint: ResumeCheckpoint | None = None):
+    """Extracts the text and the structured sections of the PDF.
+    Returns (extracted_data, feedback, fingerprints, duplicate_of); extracted_data is None on failure."""
+    # 0. An identical PDF was already processed: skip the extraction entirely
+    fingerprints = {"pdf_sha256": checkpoint.pdf_sha256 if checkpoint else await asyncio.to_thread(pdf_fingerprint, pdf)}
+    duplicate = await find_processed_duplicate([fingerprints["pdf_sha256"]]) if DUPLICATE_DETECTION_ENABLED else None
+
+    # 1. Extract text (in layout mode, already split into sections)
+    segmented = None
+    local_data = {}
+    if duplicate is None:
+        if checkpoint is not None and checkpoint.done(TEXT_EXTRACTED):
+            text = checkpoint.get("text")
+            if checkpoint.get("segmented_sections"):
+                segmented = SegmentedResume(sections=checkpoint.get("segmented_sections"), headings_found=checkpoint.get("headings_found", []))
+        else:
+            if PDF_EXTRACTION_MODE == "layout":
+                segmented = await get_pdf_extraction_service().extract_segmented(pdf)
+                if segmented is not None and not segmented.headings_found:
+                    segmented = None  # No recognizable headings: the plain text works just as well
+            text = segmented.text if segmented else await get_pdf_extraction_service().extract_text(pdf)
+            if not text:
+                print(f"Empty text extracted for user {uid}")
+                return None, None, fingerprints, None
+            if checkpoint is not None:
+                await checkpoint.save(
+                    TEXT_EXTRACTED, text=text,
+                    segmented_sections=segmented.sections if segmented else None,
+                    headings_found=segmented.headings_found if segmented else None,
+                )
+
         print(f"Este es el texto extraido (primeros 200 caracteres): {text[:200]}...\n{'═'*50}")
-        
-        # 2. Extract structured data
-        extracted_data = extract_information(text, "user_extract_all_sections")
+
+        # The same text was already processed from a different file (re-exported or re-saved PDF)
+        fingerprints["text_sha256"] = text_fingerprint(text)
+        if DUPLICATE_DETECTION_ENABLED:
+            duplicate = await find_processed_duplicate([fingerprints["text_sha256"]])
+        if duplicate is None:
+            # Contact details and clean language lists are extracted locally, not by the LLM
+            local_data = extract_rule_based_sections(text, segmented.sections.get("languages") if segmented else None)
+
+    # 2. Extract structured data
+    feedback = None
+    if duplicate is not None:
+        print(f"♻️ CV duplicado del CV {duplicate['resume_id']}: se reutilizan la extracción y la retroalimentación")
+        extracted_data, feedback = duplicate["content"], duplicate["feedback"]
+    elif pipeline_mode == "fused":
+        extracted_data, feedback = await aextract_and_analyze(format_segmented_text(segmented) if segmented else text)
+        if extracted_data:
+            extracted_data = merge_extracted_sections(extracted_data, local_data)
+    elif segmented:
+        extracted_data = await aextract_segmented_information(segmented, local=local_data)
+    else:
+        extracted_data = await aextract_information(text, "user_extract_all_sections", local=local_data)
+    if not extracted_data:
+        print(f"Failed to extract information for user {uid}")
+        if local_data:
+            await save_partial_extraction(uid, local_data)
+        return None, None, fingerprints, None
+    return extracted_data, feedback, fingerprints, (duplicate["resume_id"] if duplicate else None)
+
+class ExtractionFailed(Exception):
+    """The text or the sections of the resume could not be extracted (already logged)."""
+
+class FeedbackFailed(Exception):
+    """The feedback or its Google Doc could not be produced; the pipeline is left incomplete so it can be retried."""
+
+
+async def raw_resume_processing(pdf: bytes | str, uid: str, pipeline_mode: str = RESUME_PIPELINE_MODE, checkpoint: ResumeCheckpoint | None = None):
+    """Main execution flow for a single uploaded file, given as bytes or as a file path (read from disk, never loaded whole).
+    Returns (success, resume_id, feedback); feedback is only set in "fused" mode, where it comes from the extraction call,
+    and for a duplicate of an already processed resume, where the previous extraction and feedback are reused.
+    With a checkpoint, stages completed by an earlier attempt are skipped and each completed stage is saved.
+
+    The stages run as a DAG: the user lookup and the GCS upload don't depend on the extraction, so they overlap the LLM call.
+    The PDF URL is only saved once the extraction succeeded; if it fails, the uploaded PDF is deleted again.
+    """
+    blob = None
+    upload = None  # The upload thread; it keeps running if its stage is cancelled, so cleanup waits for it
+    async def extract_sections():
+        if checkpoint is not None and checkpoint.done(SECTIONS_EXTRACTED):
+            # Text and sections were extracted by an earlier attempt
+            return checkpoint.get("extracted_data"), checkpoint.get("feedback"), checkpoint.get("fingerprints", {}), checkpoint.get("duplicate_of")
+        extracted_data, feedback, fingerprints, duplicate_of = await extract_resume_sections(pdf, uid, pipeline_mode, checkpoint)
         if not extracted_data:
-            print(f"Failed to extract information for user {uid}")
-            return False, None
+            raise ExtractionFailed()
+        if checkpoint is not None:
+            await checkpoint.save(SECTIONS_EXTRACTED, extracted_data=extracted_data, feedback=feedback, fingerprints=fingerprints, duplicate_of=duplicate_of)
 
-        # 3. Debug print extracted data safely
+        # Debug print extracted data safely
         if isinstance(extracted_data, dict):
             print("Extracted sections:")
             for section, content in extracted_data.items():
                 print(f"  {section}: {str(content)[:100]}...")
         else:
             print(f"Raw extracted data: {str(extracted_data)[:200]}...")
-        
-        # 4. Get the user_resume_id from user's document from Firestore
-        resume_ref = db.collection(USERS_COLLECTION).document(uid)
-        resume_id = (await resume_ref.get()).get("user_resume_id")
-        
-        # 5. Upload PDF to Google Cloud Storage
+        return extracted_data, feedback, fingerprints, duplicate_of
+
+    async def lookup_resume_id():
+        # Get the user_resume_id from user's document from Firestore
+        return (await get_document(USERS_COLLECTION, uid) or {}).get("user_resume_id")
+
+    async def upload_pdf(resume_id):
+        # Upload PDF to Google Cloud Storage; the client is blocking, so it runs in a thread
+        nonlocal blob, upload
         storage_client = storage.Client()
         bucket = storage_client.bucket("cvagent_docs")  # Replace with your bucket
         blob = bucket.blob(f"resumes/{uid}/{resume_id}.pdf")
-        blob.upload_from_string(pdf_bytes, content_type="application/pdf")
-        pdf_url = blob.public_url  # Or use signed URL for security
+        if isinstance(pdf, str):
+            upload = asyncio.ensure_future(asyncio.to_thread(blob.upload_from_filename, pdf, content_type="application/pdf"))  # Streamed from disk
+        else:
+            upload = asyncio.ensure_future(asyncio.to_thread(blob.upload_from_string, pdf, content_type="application/pdf"))
+        await asyncio.shield(upload)
+        return blob.public_url  # Or use signed URL for security
+
+    async def discard_uploaded_pdf():
+        if upload is None:
+            return
+        try:
+            await upload
+            await asyncio.to_thread(blob.delete)
+            print(f"PDF subido eliminado de GCS tras el fallo del procesamiento: {blob.name}")
+        except Exception as e:
+            print(f"No se pudo eliminar el PDF subido {blob.name}: {e}")
 
-         # 6. Update the content field in the user_resume_document in Firestore
+    async def save_resume(sections, resume_id):
+        # Update the content field in the user_resume_document in Firestore
+        extracted_data, _, fingerprints, duplicate_of = sections
         user_resume_ref = db.collection(RESUME_COLLECTION).document(resume_id)
-        # Update Firestore with PDF URL
-        await user_resume_ref.update({
+        resume_update = {
             "content": extracted_data,
             "metadata.is_complete": True,
             "metadata.status": "pdf_text_extracted",
+            "metadata.fingerprints": fingerprints,
             "metadata.last_updated": firestore.SERVER_TIMESTAMP,
-        })
+        }
+        if duplicate_of:
+            resume_update["metadata.duplicate_of"] = duplicate_of
+        await user_resume_ref.update(resume_update)
+        invalidate_document(RESUME_COLLECTION, resume_id)
 
+    async def save_pdf_url(sections, pdf_url):
+        # Waits for the extraction too: a resume that failed extraction keeps no PDF URL
         user_ref = db.collection(USERS_COLLECTION).document(uid)
         await user_ref.update({"pdf_url": pdf_url})
+        invalidate_document(USERS_COLLECTION, uid)
+
+    dag = DAG()
+    dag.add("sections", extract_sections)
+    dag.add("resume_id", lookup_resume_id)
+    dag.add("pdf_url", upload_pdf, deps=["resume_id"])
+    dag.add("save_resume", save_resume, deps=["sections", "resume_id"])
+    dag.add("save_pdf_url", save_pdf_url, deps=["sections", "pdf_url"])
 
+    try:
+        dag_run = await dag.run()
+        print(f"⏱️ CV del usuario {uid} procesado: {dag_run.report()}")
+
+        resume_id = dag_run.results["resume_id"]
+        feedback = dag_run.results["sections"][1]
         print(f"CV número: {resume_id} guardado en Firestore para el usuario: {uid}")
-        return True, resume_id
-    
+        if checkpoint is not None:
+            await checkpoint.save(RAW_PROCESSED, resume_id=resume_id)
+        return True, resume_id, feedback
+
+    except ExtractionFailed:
+        await discard_uploaded_pdf()
+        return False, None, None
     except Exception as e:
         print(f"El procesamiento iniicial del CV fallo para el usuario: {uid}: {str(e)}")
         import traceback
         traceback.print_exc()  # Full stack trace
-        return False, None
+        await discard_uploaded_pdf()
+        return False, None, None
 
      
 
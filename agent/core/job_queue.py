@@ -0,0 +1,228 @@
+# agent/core/job_queue.py
+# Purpose: Persistent job queue for background work (resume processing). Jobs survive restarts, can be consumed by
+# workers in other processes, are retried with backoff and end up dead-lettered after too many failures.
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from config import JOB_QUEUE_BACKEND, JOB_QUEUE_PATH, JOB_MAX_ATTEMPTS, JOB_LEASE_SECONDS
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict
+    attempts: int          # Including the current one once the job is claimed
+    max_attempts: int
+    status: str = QUEUED
+    last_error: str | None = None
+
+
+class JobQueue(ABC):
+    """Interface for job queue backends.
+
+    A claimed job is leased to its worker for `lease_seconds`; if the worker dies without completing or failing it,
+    the job becomes claimable again once the lease expires.
+    """
+
+    @abstractmethod
+    def enqueue(self, kind: str, payload: dict, max_attempts: int | None = None, job_id: str | None = None, group_id: str | None = None) -> str:
+        """Adds a job and returns its id. Enqueueing an id that already exists is a no-op.
+        `group_id` ties jobs together (e.g. the files of one batch) so their progress can be followed with stats()."""
+
+    @abstractmethod
+    def claim(self, kinds: list[str] | None = None) -> Job | None:
+        """Leases the oldest available job (of one of `kinds`, if given), or returns None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str):
+        """Renews the lease of a job that is still being worked on."""
+
+    @abstractmethod
+    def complete(self, job_id: str):
+        """Marks a claimed job as done."""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, retry_in_seconds: float | None):
+        """Records a failed attempt. The job is retried after `retry_in_seconds`, or dead-lettered if that is None."""
+
+    @abstractmethod
+    def dead_letters(self, limit: int = 50) -> list[Job]:
+        """Returns the most recent dead-lettered jobs."""
+
+    @abstractmethod
+    def requeue(self, job_id: str):
+        """Puts a dead-lettered job back in the queue with a fresh attempt count."""
+
+    @abstractmethod
+    def stats(self, group_id: str | None = None) -> dict:
+        """Returns the number of jobs per status, for the whole queue or for one group."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue stored in a local SQLite file, shared by every worker process on the host.
+
+    Claims run in an IMMEDIATE transaction, so two processes can never lease the same job.
+    """
+
+    def __init__(self, db_path: str = JOB_QUEUE_PATH, max_attempts: int = JOB_MAX_ATTEMPTS, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+
+        queue_dir = os.path.dirname(db_path)
+        if queue_dir:
+            os.makedirs(queue_dir, exist_ok=True)
+
+        # One connection shared by every thread; all access goes through self._lock. Transactions are explicit.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_expires_at REAL,
+                last_error TEXT,
+                group_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "group_id" not in columns:  # Queue files created before job groups existed
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN group_id TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_available_at ON jobs (status, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_group_id ON jobs (group_id)")
+
+    @staticmethod
+    def _to_job(row) -> Job:
+        job_id, kind, payload, status, attempts, max_attempts, last_error = row
+        return Job(id=job_id, kind=kind, payload=json.loads(payload), attempts=attempts, max_attempts=max_attempts, status=status, last_error=last_error)
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int | None = None, job_id: str | None = None, group_id: str | None = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR IGNORE INTO jobs (id, kind, payload, status, max_attempts, available_at, group_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, kind, json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now, group_id, now, now)
+            )
+        return job_id
+
+    def claim(self, kinds: list[str] | None = None) -> Job | None:
+        now = time.time()
+        kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Queued jobs that are due, and running jobs whose worker stopped renewing its lease (crash or restart)
+                row = self._conn.execute(
+                    f"""SELECT id FROM jobs
+                    WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)){kind_filter}
+                    ORDER BY available_at ASC LIMIT 1""",
+                    (QUEUED, now, RUNNING, now, *(kinds or []))
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now + self.lease_seconds, now, row[0])
+                )
+                job_row = self._conn.execute(
+                    "SELECT id, kind, payload, status, attempts, max_attempts, last_error FROM jobs WHERE id = ?", (row[0],)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_job(job_row)
+
+    def heartbeat(self, job_id: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING)
+            )
+
+    def complete(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ?", (DONE, time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, retry_in_seconds: float | None):
+        now = time.time()
+        with self._lock:
+            if retry_in_seconds is None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, lease_expires_at = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                    (DEAD, error, now, job_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, lease_expires_at = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                    (QUEUED, now + retry_in_seconds, error, now, job_id)
+                )
+
+    def dead_letters(self, limit: int = 50) -> list[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, payload, status, attempts, max_attempts, last_error FROM jobs WHERE status = ? ORDER BY updated_at DESC LIMIT ?",
+                (DEAD, limit)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def requeue(self, job_id: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, now, now, job_id, DEAD)
+            )
+
+    def stats(self, group_id: str | None = None) -> dict:
+        with self._lock:
+            if group_id is None:
+                rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            else:
+                rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs WHERE group_id = ? GROUP BY status", (group_id,)).fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, DEAD: 0}
+        counts.update(dict(rows))
+        return counts
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def _create_job_queue() -> JobQueue:
+    """Builds the queue for the backend selected by JOB_QUEUE_BACKEND."""
+    if JOB_QUEUE_BACKEND == "sqlite":
+        return SQLiteJobQueue()
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND '{JOB_QUEUE_BACKEND}'. Expected 'sqlite'.")
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue, creating it on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = _create_job_queue()
+        return _job_queue
@@ -0,0 +1,169 @@
+# agent/core/job_workers.py
+# Purpose: Worker pool that consumes the job queue. Runs inside the web process (JOB_WORKERS_IN_WEB_PROCESS) or on its own:
+#     python -m agent.core.job_workers
+import asyncio
+import traceback
+from agent.core.job_queue import Job, get_job_queue
+from agent.tools.file_upload import discard_spooled_upload
+from agent.memory.user_db.doc_cache import request_scope
+from config import JOB_WORKER_CONCURRENCY, JOB_POLL_INTERVAL_SECONDS, JOB_RETRY_BASE_SECONDS, JOB_RETRY_MAX_SECONDS, JOB_LEASE_SECONDS
+
+PROCESS_RESUME_JOB = "process_resume"
+PROCESS_DRIVE_RESUME_JOB = "process_drive_resume"
+
+
+class JobFailed(Exception):
+    """Raised by a job handler when the attempt failed and may succeed if retried."""
+
+
+async def _run_plan(plan: list[dict], label: str):
+    """Runs a resume plan (agent/core/planning.py); any failed step fails the attempt."""
+    from agent.core.planning import execute_plan
+    result = await execute_plan(plan, label=label)
+    print(f"Processing {'failed' if result.errors else 'succeeded'} for {label}")
+    if result.errors:
+        raise JobFailed("; ".join(f"{step_id}: {error}" for step_id, error in result.errors.items()))
+
+async def process_resume_job(payload: dict):
+    """Runs the resume pipeline for an uploaded PDF. Payload: {"user_id": ..., "pdf_path": ...}."""
+    from agent.core.planning import plan_resume_processing
+    plan = plan_resume_processing("upload", {"user_id": payload["user_id"], "pdf_path": payload["pdf_path"]})
+    await _run_plan(plan, label=f"user {payload['user_id']}")
+
+def cleanup_resume_job(payload: dict):
+    """Deletes the spooled upload once the resume was processed."""
+    discard_spooled_upload(payload["pdf_path"])
+
+async def process_drive_resume_job(payload: dict):
+    """Downloads a resume from Drive into memory and runs the resume pipeline for it.
+    Payload: {"file_id": ..., "file_name": ..., "batch_id": ...}."""
+    from agent.core.planning import plan_resume_processing
+    plan = plan_resume_processing("drive_file", payload)
+    await _run_plan(plan, label=f"Drive file {payload['file_name']}")
+
+# kind -> (handler, cleanup run after success; dead-lettered jobs keep their inputs so they can be requeued)
+JOB_HANDLERS = {
+    PROCESS_RESUME_JOB: (process_resume_job, cleanup_resume_job),
+    PROCESS_DRIVE_RESUME_JOB: (process_drive_resume_job, lambda payload: None),
+}
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff: JOB_RETRY_BASE_SECONDS after the first failure, doubling up to JOB_RETRY_MAX_SECONDS."""
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+
+
+class JobWorkerPool:
+    """`concurrency` asyncio workers polling the queue. Queue calls run in threads so they never block the event loop."""
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, poll_interval: float = JOB_POLL_INTERVAL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.queue = get_job_queue()
+        self._tasks = []
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.concurrency)]
+        print(f"🧵 {self.concurrency} job workers started")
+
+    async def stop(self):
+        """Stops claiming new jobs and cancels the running ones; their leases expire and another worker picks them up."""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index: int):
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim, list(JOB_HANDLERS))
+            except Exception as e:
+                print(f"Job worker {index}: could not claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await asyncio.to_thread(self.queue.heartbeat, job.id)
+
+    async def _run(self, job: Job):
+        handler, cleanup = JOB_HANDLERS[job.kind]
+        if job.attempts > job.max_attempts:
+            # Reclaimed after its worker died on the last attempt
+            await self._finish(job, cleanup, error=job.last_error or "Worker stopped during the last attempt")
+            return
+
+        print(f"▶️ Job {job.id} ({job.kind}), intento {job.attempts}/{job.max_attempts}")
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            with request_scope():
+                await handler(job.payload)
+        except asyncio.CancelledError:
+            raise  # Shutting down: the lease expires and the job is retried elsewhere
+        except Exception as e:
+            if not isinstance(e, JobFailed):
+                traceback.print_exc()
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts < job.max_attempts:
+                delay = retry_delay(job.attempts)
+                print(f"Job {job.id} failed ({error}); retrying in {delay:.0f}s")
+                await asyncio.to_thread(self.queue.fail, job.id, error, delay)
+            else:
+                await self._finish(job, cleanup, error=error)
+            return
+        finally:
+            heartbeat.cancel()
+        await self._finish(job, cleanup)
+
+    async def _finish(self, job: Job, cleanup, error: str | None = None):
+        if error is not None:
+            await asyncio.to_thread(self.queue.fail, job.id, error, None)
+            print(f"☠️ Job {job.id} movido a dead-letter tras {job.max_attempts} intentos: {error}")
+            return
+        await asyncio.to_thread(self.queue.complete, job.id)
+        print(f"✅ Job {job.id} completado")
+        try:
+            cleanup(job.payload)
+        except Exception as e:
+            print(f"Cleanup failed for job {job.id}: {e}")
+
+
+_worker_pool = None
+
+async def start_job_workers() -> JobWorkerPool:
+    """Starts the process-wide worker pool on the running event loop."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = JobWorkerPool()
+        _worker_pool.start()
+    return _worker_pool
+
+async def stop_job_workers():
+    global _worker_pool
+    if _worker_pool is not None:
+        await _worker_pool.stop()
+        _worker_pool = None
+
+
+async def _main():
+    import config
+    config.load_all_prompts()
+    await start_job_workers()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop_job_workers()
+        from agent.tools.pdf_extraction_service import shutdown_pdf_extraction_service
+        shutdown_pdf_extraction_service()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
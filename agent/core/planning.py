@@ -1,23 +1,257 @@
-# Purpose: Decide the sequence of actions for the agent. Initially, this might be simple.
+# Purpose: Decide the sequence of actions for the agent and execute it. A plan is a dependency graph of actions:
+# independent actions run concurrently (on agent.core.dag), outputs of deterministic actions are cached by input hash,
+# and every run reports per-action timings. The job workers run every uploaded resume ("upload") and every file of a
+# Drive batch ("drive_file") through this engine; a local PDF can be analyzed with:
+#     python -m agent.core.planning path/to/resume.pdf [--analyze] [--ask-questions] [--send-email]
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from agent.core.dag import DAG, DAGRun
+from agent.tools.resume_fingerprint import pdf_fingerprint
+from config import PLAN_CACHE_ENABLED, PLAN_CACHE_PATH, MAX_UPLOAD_BYTES, DRIVE_MAX_CONCURRENT_DOWNLOADS
+
+
+def _step(step_id: str, action: str, params: dict | None = None, deps: list[str] | None = None) -> dict:
+    return {"id": step_id, "action": action, "params": params or {}, "deps": deps or []}
+
 def plan_resume_processing(source_type: str, options: dict):
-    """Determines the steps needed based on the source and options."""
+    """Determines the steps needed based on the source and options.
+    Returns a list of steps {"id", "action", "params", "deps"}; a step runs once all the steps in "deps" are done."""
     plan = []
-    if source_type == "file":
-        plan.append({"action": "extract_info", "params": {"file_path": options["file_path"]}})
-    elif source_type == "drive":
-        plan.append({"action": "list_drive_files", "params": {"folder_path": options["folder_path"]}})
-        # The execution step will loop through files based on this plan item
-        plan.append({"action": "process_drive_file_loop", "params": {}}) 
-    
-    # Common steps after initial processing/extraction
+    if source_type == "upload":
+        # An uploaded resume of a known user: the full pipeline (extraction, Firestore, feedback, Google Doc)
+        plan.append(_step("process_resume", "process_resume", {"user_id": options["user_id"], "pdf_path": options["pdf_path"]}))
+        return plan
+    elif source_type == "drive_file":
+        # One file of a Drive batch (folders are listed by the /trigger/drive endpoint, which queues one job per file):
+        # the candidate is registered while the file downloads, then the same pipeline as an upload
+        file = {"file_id": options["file_id"], "file_name": options["file_name"]}
+        plan.append(_step("register_drive_candidate", "register_drive_candidate", {**file, "batch_id": options["batch_id"]}))
+        plan.append(_step("download_file", "download_file", file))
+        plan.append(_step("process_resume", "process_resume", deps=["register_drive_candidate", "download_file"]))
+        return plan
+    elif source_type == "file":
+        # A local PDF, analyzed without storing anything in Firestore
+        plan.append(_step("extract_info", "extract_info", {"file_path": options["file_path"]}))
+
+    # Common steps after initial processing/extraction; analysis and questions only need the extraction, so they run together
     if options.get("analyze", False): # Example option
-         plan.append({"action": "analyze_resume", "params": {}}) # Params might include candidate_id
+         plan.append(_step("analyze_resume", "analyze_resume", deps=["extract_info"]))
     if options.get("ask_questions", False): # Example option
-         plan.append({"action": "generate_questions", "params": {}})
+         plan.append(_step("generate_questions", "generate_questions", deps=["extract_info"]))
     if options.get("send_email", False): # Example option
-        plan.append({"action": "format_email", "params": {}}) # Could be feedback or questions email
-        plan.append({"action": "send_email_draft", "params": {}})
-        
-    return plan 
+        content_steps = [step["id"] for step in plan if step["action"] in ("analyze_resume", "generate_questions")]
+        plan.append(_step("format_email", "format_email", deps=["extract_info", *content_steps])) # Could be feedback or questions email
+        plan.append(_step("send_email_draft", "send_email_draft", deps=["format_email"]))
+
+    return plan
+
+
+# --- Actions ---
+# Each action is called as `await action(params, inputs)`, where inputs maps the ids of its dependencies to their outputs.
+
+async def _extract_info(params: dict, inputs: dict) -> dict:
+    from agent.tools.pdf_extraction_service import get_pdf_extraction_service
+    from agent.tools.rule_based_extraction import extract_rule_based_sections
+    from agent.tools.information_extraction import aextract_information
+    file_path = params.get("file_path") or inputs["download_file"]
+    text = await get_pdf_extraction_service().extract_text(file_path)
+    if not text:
+        raise ValueError(f"No text could be extracted from {file_path}")
+    sections = await aextract_information(text, "user_extract_all_sections", local=extract_rule_based_sections(text))
+    if not sections:
+        raise ValueError(f"Could not extract the resume sections of {file_path}")
+    return {"file_path": file_path, "extracted_sections": sections}
+
+async def _analyze_resume(params: dict, inputs: dict) -> dict:
+    from agent.tools.general_feedback import generate_llm_feedback
+    # generate_llm_feedback takes a resume document, with the sections under "content"
+    feedback = await generate_llm_feedback({"content": inputs["extract_info"]["extracted_sections"]})
+    if "error" in feedback:
+        raise ValueError(f"Feedback generation failed: {feedback['error']}")
+    return feedback
+
+async def _generate_questions(params: dict, inputs: dict) -> dict:
+    from agent.core.asking_questions import complementary_questions
+    resume_content = dict(inputs["extract_info"])
+    return await asyncio.to_thread(complementary_questions, resume_content, os.path.basename(resume_content["file_path"]))
+
+async def _format_email(params: dict, inputs: dict) -> dict:
+    from agent.tools.email_sender import format_feedback_content, email_body_creation_asking_questions
+    user_info = inputs["extract_info"]["extracted_sections"].get("user_info") or {}
+    email = {"recipient": user_info.get("email"), "user_name": user_info.get("first_name") or "", "kind": None, "body": None}
+    if "generate_questions" in inputs:
+        body, _, _ = email_body_creation_asking_questions(inputs["extract_info"], inputs["generate_questions"]) or (None, None, None)
+        email.update(kind="questions", body=body)
+    if email["body"] is None and "analyze_resume" in inputs:
+        email.update(kind="feedback", body=format_feedback_content(inputs["analyze_resume"]))
+    return email
+
+async def _send_email_draft(params: dict, inputs: dict):
+    from agent.tools.email_sender import send_feedback_email_2, questions_email_draft
+    email = inputs["format_email"]
+    if not email["recipient"] or not email["body"]:
+        raise ValueError("No recipient or content for the email draft")
+    draft = questions_email_draft if email["kind"] == "questions" else send_feedback_email_2
+    result = await asyncio.to_thread(draft, email["recipient"], email["user_name"], email["body"])
+    return result[1] if result else None  # Draft id
+
+async def _register_drive_candidate(params: dict, inputs: dict) -> str:
+    from agent.memory.user_db.users import ensure_drive_candidate
+    return await ensure_drive_candidate(params["file_id"], params["file_name"], params["batch_id"])
+
+_download_slots = None
+
+async def _download_file(params: dict, inputs: dict) -> bytes:
+    """Downloads a Drive file into memory; at most DRIVE_MAX_CONCURRENT_DOWNLOADS at a time per process."""
+    global _download_slots
+    from integration.google.drive_api import download_file_bytes
+    if _download_slots is None:
+        _download_slots = asyncio.Semaphore(DRIVE_MAX_CONCURRENT_DOWNLOADS)
+    async with _download_slots:
+        return await asyncio.to_thread(download_file_bytes, params["file_id"], MAX_UPLOAD_BYTES)
+
+async def _process_resume(params: dict, inputs: dict) -> dict:
+    from agent.core.execution import ResumeFeedbackOrchestrator  # execution pulls in the Firestore and LLM clients
+    user_id = params.get("user_id") or inputs["register_drive_candidate"]
+    pdf = params.get("pdf_path") or inputs["download_file"]
+    orchestrator = ResumeFeedbackOrchestrator(user_id)
+    success = await orchestrator.process_raw_resume(pdf)
+    if not success:
+        raise ValueError(f"Resume processing failed at stage '{orchestrator.state['stage']}'")
+    return {"user_id": user_id, "stage": orchestrator.state["stage"]}
+
+
+@dataclass
+class PlanAction:
+    func: object
+    cacheable: bool = False  # Output depends only on the inputs, so it can be reused for the same input hash
+
+PLAN_ACTIONS = {
+    "extract_info": PlanAction(_extract_info, cacheable=True),
+    "analyze_resume": PlanAction(_analyze_resume, cacheable=True),
+    "generate_questions": PlanAction(_generate_questions),  # Saves the questions as a side effect (save_data)
+    "format_email": PlanAction(_format_email),
+    "send_email_draft": PlanAction(_send_email_draft),
+    "register_drive_candidate": PlanAction(_register_drive_candidate),
+    "download_file": PlanAction(_download_file),
+    "process_resume": PlanAction(_process_resume),  # Checkpointed in Firestore (agent/core/checkpoints.py) rather than cached here
+}
+
+
+# --- Execution ---
+
+_action_cache = None
+_action_cache_lock = threading.Lock()
+
+def get_action_cache():
+    """Returns the process-wide cache of action outputs (same storage as the LLM response cache, in its own file)."""
+    global _action_cache
+    with _action_cache_lock:
+        if _action_cache is None:
+            from integration.llm.response_cache import ResponseCache
+            _action_cache = ResponseCache(db_path=PLAN_CACHE_PATH)
+        return _action_cache
+
+def action_input_hash(step: dict, inputs: dict) -> str:
+    """SHA-256 of the action, its params and its inputs. Files are hashed by content, so an edited file is a new input."""
+    def content_of(value):
+        if isinstance(value, str) and value.lower().endswith(".pdf") and os.path.isfile(value):
+            return {"pdf_sha256": pdf_fingerprint(value)}
+        return value
+    canonical = json.dumps(
+        {
+            "action": step["action"],
+            "params": {key: content_of(value) for key, value in step["params"].items()},
+            "inputs": {key: content_of(value) for key, value in inputs.items()},
+        },
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+_FAILED = object()  # Output of a failed step, passed to its dependents so they skip
+
+def _output_error(output) -> str | None:
+    """The error of an action that reports failures as a dict ({"error": ...} or {"error_message": ...}) instead of raising."""
+    if isinstance(output, dict):
+        error = output.get("error") or output.get("error_message")
+        return str(error) if error else None
+    return None
+
+
+@dataclass
+class PlanResult:
+    results: dict = field(default_factory=dict)       # step id -> output
+    errors: dict = field(default_factory=dict)        # step id -> error message (the step and its dependents didn't run)
+    cache_hits: list[str] = field(default_factory=list)
+    run: DAGRun | None = None
+
+    @property
+    def timings(self) -> dict[str, float]:
+        return {name: timing.seconds for name, timing in self.run.timings.items() if timing.finished_at} if self.run else {}
+
+
+async def execute_plan(plan: list[dict], actions: dict = PLAN_ACTIONS, use_cache: bool = PLAN_CACHE_ENABLED, label: str = "plan") -> PlanResult:
+    """Runs the steps of `plan` as a dependency graph. A failed step skips its dependents but not the rest of the plan."""
+    result = PlanResult()
+
+    def make_stage(step: dict):
+        action = actions[step["action"]]
+
+        async def stage(**inputs):
+            if any(inputs.get(dep) is _FAILED for dep in step["deps"]):
+                return _FAILED
+            cache_key = None
+            if use_cache and action.cacheable:
+                cache_key = await asyncio.to_thread(action_input_hash, step, inputs)
+                cached = await asyncio.to_thread(get_action_cache().get, step["action"], cache_key)
+                if cached is not None:
+                    result.cache_hits.append(step["id"])
+                    result.results[step["id"]] = json.loads(cached)
+                    return result.results[step["id"]]
+            try:
+                output = await action.func(step["params"], inputs)
+                error = _output_error(output)
+                if error is not None:
+                    raise ValueError(error)
+            except Exception as e:
+                print(f"[{label}] La acción '{step['id']}' falló: {e}")
+                result.errors[step["id"]] = str(e)
+                return _FAILED
+            result.results[step["id"]] = output
+            if cache_key is not None and output is not None:
+                try:
+                    await asyncio.to_thread(get_action_cache().set, step["action"], cache_key, json.dumps(output))
+                except (TypeError, ValueError):
+                    pass  # Not JSON serializable: simply not cached
+            return output
+
+        return stage
+
+    dag = DAG()
+    for step in plan:
+        dag.add(step["id"], make_stage(step), deps=step["deps"])
+    result.run = await dag.run()
+
+    timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result.timings.items())
+    cached = f"; desde caché: {', '.join(result.cache_hits)}" if result.cache_hits else ""
+    print(f"⏱️ [{label}] {timings}{cached}; {result.run.report()}")
+    return result
+
+# Note: Inside process_resume, execution.raw_resume_processing runs on the same DAG executor with its own Firestore-specific stages.
+
 
-# Note: This is highly conceptual. Your execution.py will interpret this plan. You might start without a separate planning.py and embed this logic directly in execution.py, but separating it is good for agent design.
\ No newline at end of file
+if __name__ == "__main__":
+    flags = {"--analyze": "analyze", "--ask-questions": "ask_questions", "--send-email": "send_email"}
+    paths = [arg for arg in sys.argv[1:] if arg not in flags]
+    if len(paths) != 1:
+        sys.exit("Usage: python -m agent.core.planning path/to/resume.pdf [--analyze] [--ask-questions] [--send-email]")
+    options = {"file_path": paths[0], **{option: flag in sys.argv for flag, option in flags.items()}}
+    plan_result = asyncio.run(execute_plan(plan_resume_processing("file", options), label=os.path.basename(paths[0])))
+    print(json.dumps({"results": plan_result.results, "errors": plan_result.errors}, indent=2, ensure_ascii=False, default=str))
+    sys.exit(1 if plan_result.errors else 0)
@@ -13,12 +13,9 @@ from dataclasses import dataclass
 from datetime import datetime
 
 
-from integration.llm.gemini_api import GeminiAPI
-
 DATA_DIR = "data/resumes"
 DATA_FILE = "data/resume_data.json"
 PROMPTS_DIR = "prompts"
-gemini_api = GeminiAPI()
 
 def ensure_data_directory():
     """Ensures the data directory exists"""
@@ -0,0 +1,135 @@
+# agent/memory/user_db/doc_cache.py
+# Purpose: In-process read-through cache for Firestore documents. Each collection has its own TTL and LRU bound,
+# reads inside a request scope are memoized for the whole request, and writes invalidate the cached copy.
+import copy
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+# Values read in the current request (or job), keyed by (collection, key); None outside a request scope
+_request_memo: contextvars.ContextVar[dict | None] = contextvars.ContextVar("doc_cache_request_memo", default=None)
+
+
+@contextmanager
+def request_scope():
+    """Memoizes every cached read made inside the block, whatever the collection TTL, so one request or job
+    reads each document at most once. Scopes are per task: concurrent requests never share a memo."""
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+class _Bucket:
+    """LRU entries of one collection: key -> (expires_at, value)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+
+
+class DocumentCache:
+    """Read-through cache keyed by (collection, key). Collections without a TTL are only memoized per request.
+
+        data = await cache.get("users", user_id, load_user)   # load_user() runs on a miss
+        cache.invalidate("users", user_id)                      # after writing the document
+
+    Values are deep-copied on the way out, so callers can modify what they get.
+    """
+
+    def __init__(self, ttls: dict[str, float], max_entries: int, enabled: bool = True):
+        self.enabled = enabled
+        self._buckets = {collection: _Bucket(ttl, max_entries) for collection, ttl in ttls.items() if ttl > 0}
+        # Job workers are asyncio tasks on the app loop and nothing here awaits while touching the buckets, so they can't
+        # interleave; the lock only covers plain threads (e.g. invalidate() from code run with asyncio.to_thread).
+        # It is a threading lock on purpose: the cache holds no asyncio primitives, which are bound to a single loop.
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every invalidation, so a read that raced with a write isn't stored
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, collection: str, key: str):
+        bucket = self._buckets.get(collection)
+        if not self.enabled or bucket is None:
+            return None
+        with self._lock:
+            entry = bucket.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del bucket.entries[key]
+                return None
+            bucket.entries.move_to_end(key)
+            return entry
+
+    def _store(self, collection: str, key: str, value, generation: int):
+        bucket = self._buckets.get(collection)
+        if not self.enabled or bucket is None:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            bucket.entries[key] = (time.monotonic() + bucket.ttl_seconds, value)
+            bucket.entries.move_to_end(key)
+            while len(bucket.entries) > bucket.max_entries:
+                bucket.entries.popitem(last=False)
+
+    def peek(self, collection: str, key: str):
+        """Returns the cached value without loading it, or None when it isn't cached."""
+        memo = _request_memo.get()
+        if memo is not None and (collection, key) in memo:
+            self.hits += 1
+            return copy.deepcopy(memo[(collection, key)])
+        entry = self._lookup(collection, key)
+        if entry is None:
+            return None
+        self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    async def get(self, collection: str, key: str, loader: Callable[[], Awaitable], cache_if: Callable[[object], bool] = lambda value: True):
+        """Returns the cached value, or awaits `loader()` and caches its result when `cache_if(result)` is true."""
+        memo = _request_memo.get()
+        memo_key = (collection, key)
+        if memo is not None and memo_key in memo:
+            self.hits += 1
+            return copy.deepcopy(memo[memo_key])
+
+        entry = self._lookup(collection, key)
+        if entry is not None:
+            self.hits += 1
+            value = entry[1]
+        else:
+            self.misses += 1
+            generation = self._generation
+            value = await loader()
+            if not cache_if(value):
+                return value
+            self._store(collection, key, value, generation)
+        if memo is not None:
+            memo[memo_key] = value
+        return copy.deepcopy(value)
+
+    def invalidate(self, collection: str, key: str):
+        with self._lock:
+            self._generation += 1
+            bucket = self._buckets.get(collection)
+            if bucket is not None:
+                bucket.entries.pop(key, None)
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.pop((collection, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for bucket in self._buckets.values():
+                bucket.entries.clear()
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.clear()
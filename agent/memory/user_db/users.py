@@ -1,11 +1,17 @@
 #cvagent-aura/agent/memory/user_db/users.py
 import uuid
 import json
+import asyncio
+import copy
+import base64
 from google.cloud.firestore_v1.async_client import AsyncClient
 from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
 from google.cloud import firestore
 from datetime import datetime
-from config import USERS_COLLECTION, UUID_COLLECTION, RESUME_COLLECTION, HR_COLLECTION, SECTIONS_COLLECTION, user_metadata_template
+from config import USERS_COLLECTION, UUID_COLLECTION, RESUME_COLLECTION, HR_COLLECTION, SECTIONS_COLLECTION, FINGERPRINT_COLLECTION, CHECKPOINT_COLLECTION, REVIEW_QUEUE_COLLECTION, REVIEW_QUEUE_COUNTS_DOC, user_metadata_template
+from config import DOC_CACHE_ENABLED, USER_DOC_CACHE_TTL_SECONDS, EMAIL_UUID_CACHE_TTL_SECONDS, RESUME_DOC_CACHE_TTL_SECONDS, DOC_CACHE_MAX_ENTRIES
+from agent.memory.user_db.doc_cache import DocumentCache
 from fastapi import HTTPException
 from typing import Optional, List
 import os
@@ -32,6 +38,28 @@ db = firestore.AsyncClient(
     project="stone-passage-456618-i6"  
 )
 
+# Read-through cache for the documents read on every request (see get_document)
+doc_cache = DocumentCache(
+    {
+        USERS_COLLECTION: USER_DOC_CACHE_TTL_SECONDS,
+        UUID_COLLECTION: EMAIL_UUID_CACHE_TTL_SECONDS,
+        RESUME_COLLECTION: RESUME_DOC_CACHE_TTL_SECONDS,
+    },
+    max_entries=DOC_CACHE_MAX_ENTRIES,
+    enabled=DOC_CACHE_ENABLED,
+)
+
+async def get_document(collection: str, doc_id: str) -> dict | None:
+    """Returns the document data through the cache, or None if it doesn't exist (missing documents aren't cached)."""
+    async def load():
+        doc = await db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+    return await doc_cache.get(collection, doc_id, load, cache_if=lambda data: data is not None)
+
+def invalidate_document(collection: str, doc_id: str):
+    """Drops the cached copy of a document; call it after every write to the document."""
+    doc_cache.invalidate(collection, doc_id)
+
 # Verification function (optional but recommended)
 async def verify_connection():
     try:
@@ -46,15 +74,17 @@ async def verify_connection():
 
 
 async def check_user_exists(email:str) -> bool:
-    """Returns (doc_id, user_data) if exists, else (None, None)."""
-    users_ref = db.collection(USERS_COLLECTION)
-    query = users_ref.where("email", "==", email).limit(1)
-    docs = await query.get()
-    for doc in docs:
-        print(f"Found user: {doc.id}")
-        return True
-
-    return False
+    """Returns True if a user with this email exists."""
+    async def load():
+        users_ref = db.collection(USERS_COLLECTION)
+        query = users_ref.where("email", "==", email).limit(1)
+        docs = await query.get()
+        for doc in docs:
+            print(f"Found user: {doc.id}")
+            return True
+        return False
+    # Users are never deleted, so only a positive answer is cached
+    return await doc_cache.get(USERS_COLLECTION, f"email:{email}", load, cache_if=bool)
 
 async def create_user(email: str, industry: str) -> str:
     """Creates a new user document with a UUID and onboarding data."""
@@ -79,6 +109,7 @@ async def create_user(email: str, industry: str) -> str:
 
         uuid_ref = db.collection(UUID_COLLECTION).document(email.lower())
         await uuid_ref.set({"user_id": user_uuid})
+        invalidate_document(UUID_COLLECTION, email.lower())
         return user_uuid
     except Exception as ve:
         print(f"Validation error creating user {email.lower()}: {ve}")
@@ -89,12 +120,10 @@ async def create_user(email: str, industry: str) -> str:
     
 async def get_uuid_by_email(email: str) -> str:
     """Looks for the uuid, if exists, using the email and returns it."""
-    doc_ref = db.collection(UUID_COLLECTION).document(email.lower())
-    doc = await doc_ref.get()  # Properly awaited
-
-    if not doc.exists:
+    mapping = await get_document(UUID_COLLECTION, email.lower())
+    if mapping is None:
         raise HTTPException(status_code=400, detail="El usuraio no fue encontrado")
-    return doc.get("user_id")
+    return mapping.get("user_id")
 
 async def add_hashed_pwd(user_uuid: str, hashed_password: str):
     try:
@@ -102,6 +131,7 @@ async def add_hashed_pwd(user_uuid: str, hashed_password: str):
         await db.collection(USERS_COLLECTION).document(user_uuid).update({
             "hashed_password": hashed_password
         })
+        invalidate_document(USERS_COLLECTION, user_uuid)
     except Exception as e:
         print(f"Error al guardar el password the usuario {user_uuid} en Firestore: {e}")
 
@@ -156,6 +186,7 @@ async def add_resume_version(resume_data: str | dict, metadata: dict = None) ->
             elif version_type == "user":
                 update_data[metadata_field] = {**existing_data.get(metadata_field, {}), "is_complete": True}
             await resume_ref.update(update_data)
+            invalidate_document(RESUME_COLLECTION, resume_ref.id)
             return resume_ref.id
         else:
             # Create new resume (only for "user" version)
@@ -179,6 +210,7 @@ async def add_resume_version(resume_data: str | dict, metadata: dict = None) ->
                 }
 
                 await resume_ref.update(update_data)
+                invalidate_document(RESUME_COLLECTION, resume_ref.id)
                 return resume_ref.id
             else:
                 # Create new "user" version with onboarding data
@@ -198,6 +230,7 @@ async def add_resume_version(resume_data: str | dict, metadata: dict = None) ->
                 await user_ref.update({
                     "user_resume_id": resume_ref.id
                 })
+                invalidate_document(USERS_COLLECTION, user_uuid)
 
                 return resume_ref.id
         
@@ -211,23 +244,19 @@ async def add_resume_version(resume_data: str | dict, metadata: dict = None) ->
 async def fetch_resume_data(user_id: str, resume_id: str) -> str:
     """Looks for the uuid, if exists, using the email and returns it."""
     try:
-        # Construct the document reference path
-        version_ref = (
-            db.collection(RESUME_COLLECTION)
-            .document(resume_id)
-        )
-
-        # Fetch the document
-        doc = await version_ref.get()
+        # Fetch the document (read once per request; see get_document)
+        resume_data = await get_document(RESUME_COLLECTION, resume_id)
 
-        if not doc.exists:
+        if resume_data is None:
             raise HTTPException(
                 status_code=404,
                 detail="Resume version 'user' not found for the specified resume"
             )
         # Return all document data (resume sections)
-        return doc.to_dict()
+        return resume_data
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching resume sections for user {user_id}: {str(e)}")
         raise HTTPException(
@@ -235,6 +264,90 @@ async def fetch_resume_data(user_id: str, resume_id: str) -> str:
             detail=f"Failed to fetch resume data: {str(e)}"
         )
     
+
+async def find_processed_duplicate(fingerprints: list[str]) -> dict | None:
+    """Looks up the fingerprint index and returns the extracted content and feedback of a previously
+    processed resume with any of the given fingerprints, or None if there is none."""
+    try:
+        fingerprint_refs = [db.collection(FINGERPRINT_COLLECTION).document(fingerprint) for fingerprint in fingerprints]
+        async for fingerprint_doc in db.get_all(fingerprint_refs):
+            if not fingerprint_doc.exists:
+                continue
+            entry = fingerprint_doc.to_dict()
+            source_refs = [
+                db.collection(RESUME_COLLECTION).document(entry["resume_id"]),
+                db.collection(RESUME_COLLECTION).document(entry["llm_feedback_id"]),
+            ]
+            sources = {doc.id: doc async for doc in db.get_all(source_refs, field_paths=["content"])}
+            resume_doc, feedback_doc = sources.get(entry["resume_id"]), sources.get(entry["llm_feedback_id"])
+            if not (resume_doc and resume_doc.exists and feedback_doc and feedback_doc.exists):
+                continue  # The index points at deleted documents
+            return {
+                "fingerprint": fingerprint_doc.id,
+                "resume_id": entry["resume_id"],
+                "llm_feedback_id": entry["llm_feedback_id"],
+                "content": resume_doc.get("content"),
+                "feedback": feedback_doc.get("content"),
+            }
+    except Exception as e:
+        print(f"Error looking up resume fingerprints: {e}")
+    return None
+
+async def save_resume_fingerprints(fingerprints: dict, resume_id: str, llm_feedback_id: str, user_id: str):
+    """Indexes a processed resume under each of its fingerprints ({"pdf_sha256": ..., "text_sha256": ...})."""
+    try:
+        batch = db.batch()
+        for kind, fingerprint in fingerprints.items():
+            batch.set(db.collection(FINGERPRINT_COLLECTION).document(fingerprint), {
+                "kind": kind,
+                "resume_id": resume_id,
+                "llm_feedback_id": llm_feedback_id,
+                "user_id": user_id,
+                "created_at": firestore.SERVER_TIMESTAMP,
+            })
+        await batch.commit()
+    except Exception as e:
+        print(f"Error saving resume fingerprints for resume {resume_id}: {e}")
+
+async def ensure_drive_candidate(file_id: str, file_name: str, batch_id: str) -> str:
+    """Returns the user id for a resume ingested from Drive, creating the user and its "user" resume version on first use.
+    The id is derived from the Drive file id, so retrying or re-ingesting the same file reuses the same user."""
+    user_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, f"drive:{file_id}"))
+    user_ref = db.collection(USERS_COLLECTION).document(user_uuid)
+    user_doc = await user_ref.get()
+    if user_doc.exists and user_doc.get("user_resume_id"):
+        return user_uuid
+
+    await user_ref.set({
+        "uuid": user_uuid,
+        "source": "drive",
+        "drive_file_id": file_id,
+        "drive_file_name": file_name,
+        "drive_batch_id": batch_id,
+        "created_at": firestore.SERVER_TIMESTAMP,
+    }, merge=True)
+    invalidate_document(USERS_COLLECTION, user_uuid)
+    metadata = copy.deepcopy(user_metadata_template)
+    metadata["version_type"] = "user"
+    metadata["user_id"] = user_uuid
+    await add_resume_version(resume_data={"source": "drive", "drive_file_name": file_name}, metadata=metadata)
+    print(f"Candidato de Drive creado: {user_uuid} ({file_name})")
+    return user_uuid
+
+async def load_checkpoint(checkpoint_id: str) -> dict | None:
+    """Returns the stored processing checkpoint, or None if there is none."""
+    try:
+        doc = await db.collection(CHECKPOINT_COLLECTION).document(checkpoint_id).get()
+        return doc.to_dict() if doc.exists else None
+    except Exception as e:
+        print(f"Error loading checkpoint {checkpoint_id}: {e}")
+        return None
+
+async def save_checkpoint(checkpoint_id: str, data: dict):
+    """Merges the given fields into the processing checkpoint."""
+    await db.collection(CHECKPOINT_COLLECTION).document(checkpoint_id).set(
+        {**data, "last_updated": firestore.SERVER_TIMESTAMP}, merge=True
+    )
     
 async def check_hr_user_exists(email: str) -> bool:
     """Checks if an HR user exists by email."""
@@ -253,89 +366,249 @@ async def get_hr_user_by_email(email: str) -> dict:
     return docs[0].to_dict()
 
 
-async def get_pending_resumes():
-    """Fetches resumes in 'en revisión' and 'pendiente' statuses, ordered by submission date."""
-    resumes_ref = db.collection_group(RESUME_COLLECTION)
-    
-    # Query for "En Revisión" resumes
-    in_review_query = (
-        resumes_ref
-        .where(filter=FieldFilter("metadata.status", "==", "en revisión"))
-        .order_by("metadata.created_at", direction=firestore.Query.ASCENDING)
-        .limit(50)
+PENDING_REVIEW_STATUSES = ["en revisión", "pendiente"]  # Listed in this order on the dashboard
+PENDING_RESUMES_LIMIT = 50
+# Only the metadata the dashboard shows; the feedback content is never transferred
+PENDING_RESUME_FIELDS = [
+    "metadata.user_id",
+    "metadata.google_doc_url",
+    "metadata.created_at",
+    "metadata.status",
+    "metadata.onboarding.industry",
+    "metadata.industry",
+]
+
+# --- Review queue ---
+# REVIEW_QUEUE_COLLECTION holds one small document per feedback resume awaiting review, with exactly the fields
+# the dashboard renders, and REVIEW_QUEUE_COUNTS_DOC the number of resumes in each review status. Both are kept
+# up to date on every status transition, so the dashboard never queries the resume versions themselves.
+
+def _move_review_count(transaction, old_status: str | None, new_status: str | None):
+    """Moves one resume between the per-status counters (statuses outside the review queue are not counted)."""
+    deltas = {}
+    if old_status in PENDING_REVIEW_STATUSES:
+        deltas[old_status] = -1
+    if new_status in PENDING_REVIEW_STATUSES:
+        deltas[new_status] = deltas.get(new_status, 0) + 1
+    deltas = {status: delta for status, delta in deltas.items() if delta}
+    if deltas:
+        transaction.set(
+            db.document(REVIEW_QUEUE_COUNTS_DOC),
+            {"counts": {status: firestore.Increment(delta) for status, delta in deltas.items()}, "last_updated": firestore.SERVER_TIMESTAMP},
+            merge=True,
+        )
+
+async def add_to_review_queue(resume_id: str, metadata: dict):
+    """Adds the feedback resume `resume_id` (with its metadata) to the review queue and counts it under its status.
+    Safe to repeat: a retried pipeline refreshes the entry without counting it twice."""
+    queue_ref = db.collection(REVIEW_QUEUE_COLLECTION).document(resume_id)
+    user_ref = db.collection(USERS_COLLECTION).document(metadata["user_id"])
+
+    @firestore.async_transactional
+    async def add(transaction):
+        queue_doc = await queue_ref.get(transaction=transaction)
+        user_doc = await user_ref.get(transaction=transaction)
+        entry = queue_doc.to_dict() or {}
+        user_data = user_doc.to_dict() or {}
+        transaction.set(queue_ref, {
+            "user_uuid": metadata["user_id"],
+            "google_doc_url": metadata.get("google_doc_url"),
+            "industry": user_data.get("industry_of_interest") or "Unknown",
+            "status": metadata["status"],
+            "created_at": entry.get("created_at") or firestore.SERVER_TIMESTAMP,
+        })
+        _move_review_count(transaction, entry.get("status"), metadata["status"])
+
+    await add(db.transaction())
+
+async def set_review_status(resume_id: str, status: str):
+    """Changes the status of the feedback resume `resume_id`, keeping its review queue entry and the counts in sync
+    (a status outside PENDING_REVIEW_STATUSES takes the resume out of the queue)."""
+    resume_ref = db.collection(RESUME_COLLECTION).document(resume_id)
+    queue_ref = db.collection(REVIEW_QUEUE_COLLECTION).document(resume_id)
+
+    @firestore.async_transactional
+    async def update(transaction):
+        queue_doc = await queue_ref.get(transaction=transaction)
+        transaction.update(resume_ref, {
+            "metadata.status": status,
+            "metadata.last_updated": firestore.SERVER_TIMESTAMP,
+        })
+        if not queue_doc.exists:
+            return
+        if status in PENDING_REVIEW_STATUSES:
+            transaction.update(queue_ref, {"status": status})
+        else:
+            transaction.delete(queue_ref)
+        _move_review_count(transaction, queue_doc.to_dict().get("status"), status)
+
+    await update(db.transaction())
+    invalidate_document(RESUME_COLLECTION, resume_id)
+
+async def get_review_queue_counts() -> dict[str, int]:
+    """Number of resumes in each review status (one document read)."""
+    counts_doc = await db.document(REVIEW_QUEUE_COUNTS_DOC).get()
+    counts = (counts_doc.to_dict() or {}).get("counts", {}) if counts_doc.exists else {}
+    return {status: max(int(counts.get(status, 0)), 0) for status in PENDING_REVIEW_STATUSES}
+
+async def rebuild_review_queue():
+    """Rebuilds the review queue and its counts from the resume versions (for resumes stored before the queue existed,
+    or after editing statuses by hand). Run once with:
+        python -c "import asyncio; from agent.memory.user_db.users import rebuild_review_queue; asyncio.run(rebuild_review_queue())"
+    """
+    pending_docs = await (
+        db.collection_group(RESUME_COLLECTION)
+        .where(filter=FieldFilter("metadata.status", "in", PENDING_REVIEW_STATUSES))
+        .select(PENDING_RESUME_FIELDS)
+        .get()
     )
+    user_ids = {doc.to_dict().get("metadata", {}).get("user_id") for doc in pending_docs} - {None}
+    industries = {}
+    async for user_doc in db.get_all([db.collection(USERS_COLLECTION).document(user_id) for user_id in user_ids], field_paths=["industry_of_interest"]):
+        if user_doc.exists:
+            industries[user_doc.id] = user_doc.to_dict().get("industry_of_interest")
+
+    stale_docs = await db.collection(REVIEW_QUEUE_COLLECTION).select([]).get()
+    pending_ids = {doc.id for doc in pending_docs}
+    counts = {status: 0 for status in PENDING_REVIEW_STATUSES}
+    batch, batch_size = db.batch(), 0
+    writes = [(doc.reference, None) for doc in stale_docs if doc.id not in pending_ids]
+    for doc in pending_docs:
+        metadata = doc.to_dict().get("metadata", {})
+        counts[metadata["status"]] += 1
+        industry = industries.get(metadata.get("user_id")) or (metadata.get("onboarding") or {}).get("industry") or metadata.get("industry") or "Unknown"
+        writes.append((db.collection(REVIEW_QUEUE_COLLECTION).document(doc.id), {
+            "user_uuid": metadata.get("user_id"),
+            "google_doc_url": metadata.get("google_doc_url"),
+            "industry": industry,
+            "status": metadata["status"],
+            "created_at": metadata.get("created_at") or firestore.SERVER_TIMESTAMP,
+        }))
+    for ref, entry in writes:
+        if entry is None:
+            batch.delete(ref)
+        else:
+            batch.set(ref, entry)
+        batch_size += 1
+        if batch_size == 500:  # Firestore batch limit
+            await batch.commit()
+            batch, batch_size = db.batch(), 0
+    batch.set(db.document(REVIEW_QUEUE_COUNTS_DOC), {"counts": counts, "last_updated": firestore.SERVER_TIMESTAMP})
+    await batch.commit()
+    print(f"✅ Cola de revisión reconstruida: {counts}")
+    return counts
+
+def encode_resume_cursor(doc) -> str:
+    """Opaque cursor pointing just after `doc` in the review queue order (status, created_at, document path)."""
+    entry = doc.to_dict()
+    created_at = entry.get("created_at")
+    position = {
+        "status": entry.get("status"),
+        "created_at": created_at.isoformat() if created_at else None,
+        "path": doc.reference.path,
+    }
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+def decode_resume_cursor(cursor: str) -> dict:
+    """Cursor values for start_after(). Raises ValueError for a malformed cursor."""
     try:
-        in_review_docs = await in_review_query.get()
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {
+            "status": position["status"],
+            "created_at": datetime.fromisoformat(position["created_at"]) if position["created_at"] else None,
+            FieldPath.document_id(): db.document(position["path"]),
+        }
     except Exception as e:
-        print(f"Error fetching 'en revisión' resumes: {str(e)}")
-        raise Exception("Error fetching 'En Revisión' resumes")
-    
-    # Query for "Pendiente" resumes
-    remaining_limit = 50 - len(in_review_docs)
+        raise ValueError(f"Invalid cursor: {e}")
+
+async def get_pending_resumes(cursor: str | None = None, page_size: int = PENDING_RESUMES_LIMIT) -> tuple[list[dict], str | None]:
+    """Fetches one page of resumes in 'en revisión' and 'pendiente' statuses, ordered by submission date.
+    Returns (resumes, next_cursor); pass next_cursor back to get the following page. next_cursor is None on the last page."""
+    # The review queue only holds pending resumes; ordering by status first lists "en revisión" before "pendiente"
+    # (composite index: status + created_at). The document id breaks ties, so the cursor is exact
+    # and a page never re-reads earlier documents.
     pending_query = (
-        resumes_ref
-        .where(filter=FieldFilter("metadata.status", "==", "pendiente"))
-        .order_by("metadata.created_at", direction=firestore.Query.ASCENDING)
-        .limit(remaining_limit)
+        db.collection(REVIEW_QUEUE_COLLECTION)
+        .order_by("status", direction=firestore.Query.ASCENDING)
+        .order_by("created_at", direction=firestore.Query.ASCENDING)
+        .order_by(FieldPath.document_id(), direction=firestore.Query.ASCENDING)
     )
+    if cursor:
+        pending_query = pending_query.start_after(decode_resume_cursor(cursor))
+    # One extra document tells whether there is a next page
+    pending_query = pending_query.limit(page_size + 1)
     try:
-        pending_docs = await pending_query.get()
+        all_docs = list(await pending_query.get())
     except Exception as e:
-        print(f"Error fetching pendiente' resumes: {str(e)}")
-        raise Exception("Error fetching 'pendiente' resumes")
-    
-    
-    # Combine results: "En Revisión" first, then "Pendiente"
-    all_docs = list(in_review_docs) + list(pending_docs)
+        print(f"Error fetching pending resumes: {str(e)}")
+        raise Exception("Error fetching 'En Revisión' and 'Pendiente' resumes")
     
     # Extract and format data
     resume_list = []
-    for doc in all_docs:
-        resume_data = doc.to_dict()
-        user_uuid = resume_data["metadata"]["user_id"]
-        google_doc_url = resume_data["metadata"].get("google_doc_url")
-        submission_date = (
-            resume_data["metadata"]["created_at"].isoformat()
-            if resume_data["metadata"].get("created_at")
-            else "Unknown"
-        )
+    for doc in all_docs[:page_size]:
+        entry = doc.to_dict()
         resume_list.append({
-            "user_uuid": user_uuid,
-            "google_doc_url": google_doc_url,
+            "user_uuid": entry.get("user_uuid"),
+            "google_doc_url": entry.get("google_doc_url"),
             "resume_id": doc.id,
-            "submission_date": submission_date,
-            "industry": resume_data["metadata"]["onboarding"].get("industry") if resume_data["metadata"].get("onboarding") else resume_data["metadata"].get("industry", "Unknown"),
-            "status": resume_data["metadata"].get("status", "Unknown")
+            "submission_date": entry["created_at"].isoformat() if entry.get("created_at") else "Unknown",
+            "industry": entry.get("industry", "Unknown"),
+            "status": entry.get("status", "Unknown")
         })
-    return resume_list
+    next_cursor = encode_resume_cursor(all_docs[page_size - 1]) if len(all_docs) > page_size else None
+    return resume_list, next_cursor
+
+# Only the fields hr_review.html renders
+HR_REVIEW_USER_FIELDS = ["uuid", "email", "industry_of_interest", "pdf_url"]
+HR_REVIEW_FEEDBACK_FIELDS = ["metadata.google_doc_url"]
+HR_REVIEW_RESUME_FIELDS = ["metadata.onboarding"]
 
 async def get_hr_review_data(user_uuid: str, resume_id: str):
-    # Fetch user data
+    """Data for the HR review page in one round trip: the user and LLM feedback documents (unless cached) in one
+    batched read, concurrently with the query for the resume metadata."""
     user_ref = db.collection(USERS_COLLECTION).document(user_uuid)
-    user_doc = await user_ref.get()
-    if not user_doc.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_data = user_doc.to_dict()
-    
+    llm_feedback_ref = db.collection(RESUME_COLLECTION).document(resume_id)
+    cached = {
+        user_ref.path: doc_cache.peek(USERS_COLLECTION, user_uuid),
+        llm_feedback_ref.path: doc_cache.peek(RESUME_COLLECTION, resume_id),
+    }
+
+    async def fetch_documents() -> dict:
+        missing = [ref for ref in (user_ref, llm_feedback_ref) if cached[ref.path] is None]
+        if not missing:
+            return cached
+        # Projected documents are partial, so they are not stored in the cache
+        fetched = {doc.reference.path: doc async for doc in db.get_all(missing, field_paths=HR_REVIEW_USER_FIELDS + HR_REVIEW_FEEDBACK_FIELDS)}
+        return {
+            path: data if data is not None else (fetched[path].to_dict() if path in fetched and fetched[path].exists else None)
+            for path, data in cached.items()
+        }
+
     # Fetch original resume document (version_type == "user")
-    original_resume_query = db.collection(RESUME_COLLECTION).where("metadata.user_id", "==", user_uuid).where("metadata.version_type", "==", "llm_feedback").limit(1)
-    original_resume_docs = await original_resume_query.get()
+    original_resume_query = (
+        db.collection(RESUME_COLLECTION)
+        .where("metadata.user_id", "==", user_uuid)
+        .where("metadata.version_type", "==", "llm_feedback")
+        .select(HR_REVIEW_RESUME_FIELDS)
+        .limit(1)
+    )
+    documents, original_resume_docs = await asyncio.gather(fetch_documents(), original_resume_query.get())
+
+    user_data = documents[user_ref.path]
+    if user_data is None:
+        raise HTTPException(status_code=404, detail="User not found")
     if not original_resume_docs:
         raise HTTPException(status_code=404, detail="Original resume not found")
     original_resume_doc = original_resume_docs[0].to_dict()
-    
-    # Fetch LLM feedback document
-    llm_feedback_ref = db.collection(RESUME_COLLECTION).document(resume_id)
-    llm_feedback_doc = await llm_feedback_ref.get()
-    if not llm_feedback_doc.exists:
+    llm_feedback_data = documents[llm_feedback_ref.path]
+    if llm_feedback_data is None:
         raise HTTPException(status_code=404, detail="LLM feedback not found")
-    llm_feedback_data = llm_feedback_doc.to_dict()
     
     # Extract necessary data
     user_details = user_data
-    resume_metadata = original_resume_doc['metadata']
+    resume_metadata = original_resume_doc.get('metadata', {})
     user_pdf_url = user_details.get('pdf_url', 'no_pdf_url')
-    llm_google_doc_edit_url = llm_feedback_data['metadata'].get('google_doc_url', 'no_google_doc_url')
+    llm_google_doc_edit_url = llm_feedback_data.get('metadata', {}).get('google_doc_url', 'no_google_doc_url')
     llm_feedback_resume_id = resume_id
     
     return {
@@ -344,4 +617,4 @@ async def get_hr_review_data(user_uuid: str, resume_id: str):
         "user_pdf_url": user_pdf_url,
         "llm_google_doc_edit_url": llm_google_doc_edit_url,
         "llm_feedback_resume_id": llm_feedback_resume_id
-    }
\ No newline at end of file
+    }
@@ -1,10 +1,59 @@
+import os
+import tempfile
 from fastapi import UploadFile, HTTPException, BackgroundTasks
 from pathlib import Path 
-import shutil 
+from config import MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES, UPLOAD_SPOOL_DIR
 
 UPLOAD_DIR_RESUME = Path("data/resumes")
 UPLOAD_DIR_RESUME.mkdir(parents=True, exist_ok=True)
 
+PDF_MAGIC = b"%PDF-"
+
+
+async def copy_upload(file: UploadFile, destination, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """Copies the upload to an open binary file in UPLOAD_CHUNK_BYTES chunks, so only one chunk is held in memory.
+    Raises HTTPException(413) as soon as the upload exceeds `max_bytes` and HTTPException(400) if it isn't a PDF.
+    Returns the number of bytes copied."""
+    size = getattr(file, "size", None)  # Known when the multipart parser reports it
+    if size is not None and size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB.")
+
+    copied = 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        if copied == 0 and not chunk.startswith(PDF_MAGIC):
+            raise HTTPException(status_code=400, detail="El archivo no es un PDF válido.")
+        copied += len(chunk)
+        if copied > max_bytes:
+            raise HTTPException(status_code=413, detail=f"El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB.")
+        destination.write(chunk)
+    if copied == 0:
+        raise HTTPException(status_code=400, detail="El archivo está vacío.")
+    return copied
+
+async def spool_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """Copies an uploaded PDF to a file in UPLOAD_SPOOL_DIR and returns its path.
+    The file outlives the request, so background processing can read it; the caller deletes it with discard_spooled_upload."""
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    spooled = tempfile.NamedTemporaryFile(prefix="resume_", suffix=".pdf", dir=UPLOAD_SPOOL_DIR, delete=False)
+    try:
+        with spooled:
+            size = await copy_upload(file, spooled, max_bytes)
+        print(f"PDF '{file.filename}' ({size} bytes) copiado a {spooled.name}")
+        return spooled.name
+    except Exception:
+        discard_spooled_upload(spooled.name)
+        raise
+    finally:
+        await file.close()
+
+def discard_spooled_upload(path: str):
+    """Deletes a temporary copy made by spool_upload."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"No se pudo borrar el archivo temporal {path}: {e}")
 
 
 async def process_and_save_resume(background_tasks: BackgroundTasks, file: UploadFile):
@@ -14,15 +63,19 @@ async def process_and_save_resume(background_tasks: BackgroundTasks, file: Uploa
         raise HTTPException(status_code=400, detail="Tipo de archivo invalido. Solo archivos PDF son aceptados.")
 
     # Use a safe path - consider making filename unique later
-    save_path = UPLOAD_DIR_RESUME / file.filename
+    save_path = UPLOAD_DIR_RESUME / Path(file.filename).name
     print(f"Attempting to save file via resume router logic to: {save_path}")
 
     try:
         with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+            await copy_upload(file, buffer)
         print(f"File '{file.filename}' saved successfully via resume router logic.")
+    except HTTPException:
+        save_path.unlink(missing_ok=True)
+        raise
     except Exception as e:
         print(f"Error saving file in resume router logic: {e}")
+        save_path.unlink(missing_ok=True)
         # Raise a different exception type or handle as needed
         raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
     finally:
@@ -31,4 +84,4 @@ async def process_and_save_resume(background_tasks: BackgroundTasks, file: Uploa
 
     # Trigger background processing by the agent (Placeholder)
     # background_tasks.add_task(trigger_resume_processing_from_file, str(save_path), file.filename)
-    print(f"Placeholder: Background processing triggered via resume router logic for {file.filename}.")
\ No newline at end of file
+    print(f"Placeholder: Background processing triggered via resume router logic for {file.filename}.")
@@ -1,15 +1,42 @@
 #core/general_feedback.py
 
-from integration.llm.gemini_api import GeminiAPI
-from agent.tools.information_extraction import clean_json_response
+from integration.llm.registry import get_llm_client
+from agent.tools.information_extraction import (
+    parse_json_response, validate_resume_structure, build_extraction_prompt, usable_response_steps, arun_llm_steps,
+    RateLimitException, RESUME_RESPONSE_SCHEMA,
+)
+from agent.tools.streaming_json import IncrementalJSONObjectParser
 from datetime import datetime
-from config import PROMPTS
+from config import PROMPTS, LLM_STREAM_FEEDBACK, LLM_STRUCTURED_OUTPUT
 import re
+import time
+import inspect
 import unicodedata
 import json
 import os
 
-gemini_api = GeminiAPI()
+# Sections returned by the resume analysis prompt, each with its feedback and an enhanced example
+FEEDBACK_SECTIONS = ["summary", "hard_skills", "soft_skills", "work_experience", "education", "languages"]
+
+FEEDBACK_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        section: {
+            "type": "object",
+            "properties": {"feedback": {"type": "string"}, "example": {"type": "string"}},
+            "required": ["feedback", "example"],
+        }
+        for section in FEEDBACK_SECTIONS
+    },
+    "required": FEEDBACK_SECTIONS,
+}
+
+# Fused mode: the extracted sections and their feedback come back in one response
+FUSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {"sections": RESUME_RESPONSE_SCHEMA, "feedback": FEEDBACK_RESPONSE_SCHEMA},
+    "required": ["sections", "feedback"],
+}
 
 def normalize_text(text):
     """Remove accents and convert to lowercase"""
@@ -83,7 +110,49 @@ def parse_sections(feedback_text):
     
     return sections
 
-async def generate_llm_feedback(resume_dict):
+async def _emit_section(on_section, section_key, section_value):
+    """Calls the optional per-section callback, awaiting it if it is a coroutine."""
+    if on_section is None:
+        return
+    result = on_section(section_key, section_value)
+    if inspect.isawaitable(result):
+        await result
+
+async def _stream_feedback(formatted_prompt, on_section, response_schema):
+    """Streams the analysis and emits each section as soon as its JSON value is complete.
+    Returns the raw response text (None if the stream broke midway), the sections parsed so far and whether the whole object was parsed."""
+    parser = IncrementalJSONObjectParser()
+    sections = {}
+    started_at = time.perf_counter()
+    try:
+        async for chunk in get_llm_client().astream_content(formatted_prompt, response_schema=response_schema):
+            for section_key, section_value in parser.feed(chunk):
+                if not sections:
+                    print(f"Primera sección del feedback ('{section_key}') recibida en {time.perf_counter() - started_at:.2f}s")
+                sections[section_key] = section_value
+                await _emit_section(on_section, section_key, section_value)
+    except Exception as e:
+        print(f"El streaming del feedback se interrumpió tras {len(sections)} secciones: {e}")
+        return None, sections, False
+    return parser.text, sections, parser.completed and not parser.failed_members
+
+def _parse_feedback_response(response) -> dict | None:
+    """Parses the analysis response (with a local repair pass). Returns None if it isn't valid JSON."""
+    response_text = str(response).strip()
+    try:
+        return parse_json_response(response_text)
+    except json.JSONDecodeError as json_err:
+        print(f"JSON parsing error: {json_err}")
+        print(f"Attempted to parse: {response_text}")
+        return None
+
+async def generate_llm_feedback(resume_dict, on_section=None, stream: bool = LLM_STREAM_FEEDBACK):
+    """Generates feedback for every resume section.
+    Args:
+        resume_dict: Resume document with the extracted sections under "content".
+        on_section: Optional callback (sync or async) called with (section_key, section_value) as each section is ready.
+        stream: When True, the response is streamed and sections are emitted before the model finishes.
+    Returns: dict with the feedback per section, or an error dict."""
     try:
         prompt_content = PROMPTS["resume_analysis"]
         
@@ -102,24 +171,32 @@ async def generate_llm_feedback(resume_dict):
         )
         
         # Get feedback from Gemini
-        feedback_response = gemini_api.generate_content(formatted_prompt)
+        response_schema = FEEDBACK_RESPONSE_SCHEMA if LLM_STRUCTURED_OUTPUT else None
+        emitted_sections = {}
+        feedback_response = None
+        if stream:
+            feedback_response, emitted_sections, is_complete = await _stream_feedback(formatted_prompt, on_section, response_schema)
+            if is_complete:
+                return emitted_sections
+            # An interrupted stream (None) isn't a response, so it is asked again without streaming
 
-        try:
-            # Clean the response text
-            response_text = str(feedback_response).strip()
-            response_text = clean_json_response(response_text)
-            feedback_dict = json.loads(response_text)
-
-            return feedback_dict
-            
-        except json.JSONDecodeError as json_err:
-            print(f"JSON parsing error: {json_err}")
-            print(f"Attempted to parse: {response_text}")
+        # Clean the response text (with a local repair pass), re-requesting only if that isn't enough
+        feedback_dict, feedback_response = await arun_llm_steps(
+            usable_response_steps(formatted_prompt, response_schema, _parse_feedback_response, response=feedback_response, label="feedback"),
+            get_llm_client().agenerate_content,
+        )
+        if feedback_dict is None:
             return {
-                'error': f"Failed to parse Gemini response as JSON: {str(json_err)}",
+                'error': "Failed to parse Gemini response as JSON",
                 'raw_response': str(feedback_response),
                 'analysis_timestamp': datetime.now().isoformat()
             }
+
+        for section_key, section_value in feedback_dict.items():
+            if section_key not in emitted_sections:
+                await _emit_section(on_section, section_key, section_value)
+
+        return feedback_dict
     except Exception as e:
         print(f"Error in general analyzer: {e}")
         return {
@@ -127,6 +204,65 @@ async def generate_llm_feedback(resume_dict):
             'analysis_timestamp': datetime.now().isoformat()
         }
     
+def _parse_fused_response(response) -> tuple[dict | None, dict | None]:
+    """Splits a fused response into (sections, feedback); either is None if missing or invalid."""
+    if not response:
+        print("⚠️ Empty response from LLM")
+        return None, None
+
+    response_text = str(response).strip()
+    try:
+        data = parse_json_response(response_text)
+    except json.JSONDecodeError as e:
+        print(f"🔴 JSON parsing error: {e}")
+        print(f"Problematic response (500 chars):\n{response_text[:500]}...")
+        return None, None
+    if not isinstance(data, dict):
+        print("⚠️ Top-level data is not a dictionary")
+        return None, None
+
+    sections = data.get("sections")
+    if not validate_resume_structure(sections):
+        sections = None
+
+    feedback = data.get("feedback")
+    if not isinstance(feedback, dict) or any(section not in feedback for section in FEEDBACK_SECTIONS):
+        print("⚠️ Fused response is missing feedback sections")
+        feedback = None
+
+    return sections, feedback
+
+async def aextract_and_analyze(resume_txt: str, on_section=None, prompt_key: str = "fused_extract_and_analyze") -> tuple[dict | None, dict | None]:
+    """Extracts the resume sections and generates their feedback with a single LLM call.
+    Args:
+        resume_txt: Text extracted from the resume PDF.
+        on_section: Optional callback (sync or async) called with (section_key, section_value) for each feedback section.
+        prompt_key: Key of the fused prompt in PROMPTS.
+    Returns: (sections, feedback); either is None if the model didn't return a usable value for it."""
+    try:
+        prompt = build_extraction_prompt(resume_txt, prompt_key)
+        if prompt is None:
+            return None, None
+        response_schema = FUSED_RESPONSE_SCHEMA if LLM_STRUCTURED_OUTPUT else None
+        (sections, feedback), _ = await arun_llm_steps(usable_response_steps(
+            prompt, response_schema, _parse_fused_response,
+            is_usable=lambda parsed: None not in parsed, label="fused extraction",
+        ))
+
+        # The feedback is nested under "feedback", so sections are handed downstream once the response is complete
+        if feedback is not None:
+            for section_key, section_value in feedback.items():
+                await _emit_section(on_section, section_key, section_value)
+
+        return sections, feedback
+
+    except RateLimitException as e:
+        print(f"⏳ Rate limited: {e}")
+        return None, None
+    except Exception as e:
+        print(f"🔥 LLM communication error: {e}")
+        return None, None
+    
 def general_analyzer_df(first_name, candidate_data, skills, experience, education, languages):
     """Analyze resume data from dataframes and generate feedback
     
@@ -203,7 +339,7 @@ def general_analyzer_df(first_name, candidate_data, skills, experience, educatio
         )
         
         # Get feedback from Gemini
-        feedback_response = gemini_api.generate_content(formatted_prompt)
+        feedback_response = get_llm_client().generate_content(formatted_prompt)
 
         try:
             # Clean the response text
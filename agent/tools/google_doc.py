@@ -112,7 +112,115 @@ def _format_work_experience_requests(example_text: str, start_index: int) -> tup
         return fallback_requests, fallback_index
 
 
-async def create_google_doc(user_id: str, feedback_data: dict, doc_purpose: str = "Reporte_de_retroalimentación v1") -> str | None:
+# Standard section order for the feedback document
+FEEDBACK_SECTION_ORDER = ["summary", "hard_skills", "soft_skills", "work_experience", "education", "languages"]
+
+def _format_section_requests(section_key: str, section_value: dict, start_index: int) -> tuple[list, int]:
+    """
+    Generates the Docs API requests (heading, feedback and example) for one feedback section.
+
+    Args:
+        section_key (str): The section key (e.g., "summary", "work_experience").
+        section_value (dict): The section data with 'feedback' and 'example'.
+        start_index (int): The starting index in the Google Doc for inserting content.
+
+    Returns:
+        tuple[list, int]: The Docs API requests and the updated index after adding the content.
+    """
+    requests = []
+    current_index = start_index
+
+    # Safely get feedback and example text
+    feedback_text = section_value.get("feedback", "").strip() if section_value else ""
+    example_text = section_value.get("example", "").strip() if section_value else ""
+
+    # Skip section entirely if both feedback and example are empty
+    if not feedback_text and not example_text:
+        return requests, current_index
+
+    # --- Section Title ---
+    title = section_key.replace('_', ' ').title()
+    # Add section heading (e.g., "Summary", "Hard Skills")
+    section_title_text = f"{title}\n"
+    requests.append({'insertText': {'location': {'index': current_index}, 'text': section_title_text}})
+    # Apply Heading 1 style
+    requests.append({'updateParagraphStyle': {
+        'range': {'startIndex': current_index, 'endIndex': current_index + len(section_title_text)},
+        'paragraphStyle': {'namedStyleType': 'HEADING_1'},
+        'fields': 'namedStyleType'}})
+    current_index += len(section_title_text)
+
+    # --- Feedback Text ---
+    if feedback_text:
+        feedback_content = f"Feedback:\n{feedback_text}\n\n" # Add label and spacing
+        requests.append({'insertText': {'location': {'index': current_index}, 'text': feedback_content}})
+        current_index += len(feedback_content)
+
+    # --- Example Text (Conditional Formatting) ---
+    if example_text:
+        if section_key == "work_experience":
+            # Use the helper function for special formatting
+            print(f"Formatting work experience example for section: {section_key}")
+            wx_requests, updated_index = _format_work_experience_requests(example_text, current_index)
+            requests.extend(wx_requests)
+            current_index = updated_index
+        else:
+            # Standard formatting for other sections
+            print(f"Formatting standard example for section: {section_key}")
+            example_content = f"Example:\n{example_text}\n\n"
+            requests.append({'insertText': {'location': {'index': current_index}, 'text': example_content}})
+            current_index += len(example_content)
+
+    return requests, current_index
+
+
+class FeedbackDocBuilder:
+    """
+    Builds the Docs API requests for the feedback document incrementally.
+
+    Sections can be added in any order (e.g., as they arrive from a streamed LLM response); each one
+    is formatted as soon as every section before it in FEEDBACK_SECTION_ORDER has been added, so the
+    final document always follows the standard order. Unknown sections are ignored.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.current_index = 1 # Docs API uses 1-based indexing for content
+        self._pending = {}
+        self._next_position = 0
+
+        # --- Document Title ---
+        doc_main_title = "Retroalimentación de tu CV\n"
+        self.requests.append({'insertText': {'location': {'index': self.current_index}, 'text': doc_main_title}})
+        self.requests.append({'updateParagraphStyle': {
+            'range': {'startIndex': self.current_index, 'endIndex': self.current_index + len(doc_main_title)},
+            'paragraphStyle': {'namedStyleType': 'TITLE'},
+            'fields': 'namedStyleType'}})
+        self.current_index += len(doc_main_title)
+
+    def _format(self, section_key: str):
+        section_requests, self.current_index = _format_section_requests(section_key, self._pending.pop(section_key), self.current_index)
+        self.requests.extend(section_requests)
+
+    def add_section(self, section_key: str, section_value: dict):
+        """Adds a section and formats every section that is now ready in order."""
+        if section_key not in FEEDBACK_SECTION_ORDER or not isinstance(section_value, dict):
+            return
+        self._pending[section_key] = section_value
+        while self._next_position < len(FEEDBACK_SECTION_ORDER) and FEEDBACK_SECTION_ORDER[self._next_position] in self._pending:
+            self._format(FEEDBACK_SECTION_ORDER[self._next_position])
+            self._next_position += 1
+
+    def finish(self) -> list:
+        """Formats any sections still waiting on a missing predecessor and returns all requests."""
+        for section_key in FEEDBACK_SECTION_ORDER[self._next_position:]:
+            if section_key in self._pending:
+                self._format(section_key)
+        self._next_position = len(FEEDBACK_SECTION_ORDER)
+        return self.requests
+
+
+async def create_google_doc(user_id: str, feedback_data: dict, doc_purpose: str = "Reporte_de_retroalimentación v1", doc_requests: list | None = None) -> str | None:
         """
         Creates a Google Doc, populates it with formatted feedback, and returns the URL.
         Includes special formatting for the work experience section.
@@ -124,6 +232,8 @@ async def create_google_doc(user_id: str, feedback_data: dict, doc_purpose: str
             feedback_data (dict): The dictionary containing feedback sections
                                     (e.g., summary, hard_skills) with 'feedback' and 'example'.
             doc_purpose (str): A string describing the purpose of the document (used in title).
+            doc_requests (list | None): Docs API requests already built with FeedbackDocBuilder.
+                                    If None, they are built from feedback_data.
 
         Returns:
             str | None: The URL (webViewLink) of the created Google Doc, or None if creation failed.
@@ -182,68 +292,13 @@ async def create_google_doc(user_id: str, feedback_data: dict, doc_purpose: str
             print(f"Successfully created Google Doc file. ID: {doc_id}, URL: {doc_url}")
 
             # --- 4. Format Content for Docs API ---
-            requests = []
-            current_index = 1 # Docs API uses 1-based indexing for content
-
-            # --- Document Title ---
-            doc_main_title = "Retroalimentación de tu CV\n"
-            requests.append({'insertText': {'location': {'index': current_index}, 'text': doc_main_title}})
-            requests.append({'updateParagraphStyle': {
-                'range': {'startIndex': current_index, 'endIndex': current_index + len(doc_main_title)},
-                'paragraphStyle': {'namedStyleType': 'TITLE'},
-                'fields': 'namedStyleType'}})
-            current_index += len(doc_main_title)
-
-            # --- Sections ---
-            # Define standard section order (optional, but good for consistency)
-            section_order = ["summary", "hard_skills", "soft_skills", "work_experience", "education", "languages"]
-
-            # Iterate through sections in defined order, skipping if not present in data
-            for section_key in section_order:
-                if section_key not in feedback_data:
-                    continue # Skip section if no data provided
-
-                section_value = feedback_data[section_key]
-                # Safely get feedback and example text
-                feedback_text = section_value.get("feedback", "").strip() if section_value else ""
-                example_text = section_value.get("example", "").strip() if section_value else ""
-
-                # Skip section entirely if both feedback and example are empty
-                if not feedback_text and not example_text:
-                    continue
-
-                # --- Section Title ---
-                title = section_key.replace('_', ' ').title()
-                # Add section heading (e.g., "Summary", "Hard Skills")
-                section_title_text = f"{title}\n"
-                requests.append({'insertText': {'location': {'index': current_index}, 'text': section_title_text}})
-                # Apply Heading 1 style
-                requests.append({'updateParagraphStyle': {
-                    'range': {'startIndex': current_index, 'endIndex': current_index + len(section_title_text)},
-                    'paragraphStyle': {'namedStyleType': 'HEADING_1'},
-                    'fields': 'namedStyleType'}})
-                current_index += len(section_title_text)
-
-                # --- Feedback Text ---
-                if feedback_text:
-                    feedback_content = f"Feedback:\n{feedback_text}\n\n" # Add label and spacing
-                    requests.append({'insertText': {'location': {'index': current_index}, 'text': feedback_content}})
-                    current_index += len(feedback_content)
-
-                # --- Example Text (Conditional Formatting) ---
-                if example_text:
-                    if section_key == "work_experience":
-                        # Use the helper function for special formatting
-                        print(f"Formatting work experience example for section: {section_key}")
-                        wx_requests, updated_index = _format_work_experience_requests(example_text, current_index)
-                        requests.extend(wx_requests)
-                        current_index = updated_index
-                    else:
-                        # Standard formatting for other sections
-                        print(f"Formatting standard example for section: {section_key}")
-                        example_content = f"Example:\n{example_text}\n\n"
-                        requests.append({'insertText': {'location': {'index': current_index}, 'text': example_content}})
-                        current_index += len(example_content)
+            # Requests may have been built already while the feedback was streaming in
+            if doc_requests is None:
+                doc_builder = FeedbackDocBuilder()
+                for section_key, section_value in feedback_data.items():
+                    doc_builder.add_section(section_key, section_value)
+                doc_requests = doc_builder.finish()
+            requests = doc_requests
 
             print(f"Prepared {len(requests)} requests for Docs API batchUpdate.")
 
@@ -1,25 +1,20 @@
 #core/information_extractor.py
 import os
 import json
-import fitz
 from io import BytesIO
+import re
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from integration.llm.gemini_api import GeminiAPI
-from config import PROMPTS
-
-gemini_api = GeminiAPI()
+from integration.llm.registry import get_llm_client
+from agent.tools.prompt_budget import fit_resume_text_to_budget
+from agent.tools.pdf_extraction_service import extract_pdf_text
+from agent.tools.layout_extraction import SegmentedResume, format_segmented_text, local_sections
+from config import PROMPTS, LLM_STRUCTURED_OUTPUT, LLM_PARSE_MAX_REREQUESTS
     
 def get_resume_text_from_pdf(pdf_bytes: bytes) -> str:
-    """Extracts text from PDF bytes (no file saved)."""
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = "\n".join(page.get_text() for page in doc)
-        doc.close()
-        return text.strip() if text else None
-    except Exception as e:
-        print(f"Error extrayendo texto de PDF: {e}")
-        return None
+    """Extracts text from PDF bytes (no file saved) in the calling thread.
+    Code running on the event loop should await get_pdf_extraction_service().extract_text() instead."""
+    return extract_pdf_text(pdf_bytes)
     
 class RateLimitException(Exception):
     pass
@@ -30,9 +25,9 @@ class RateLimitException(Exception):
     retry=retry_if_exception_type(RateLimitException)
 )
 
-def retry_generate_content(prompt):
+def retry_generate_content(prompt, response_schema=None):
     try:
-        response = gemini_api.generate_content(prompt)
+        response = get_llm_client().generate_content(prompt, response_schema=response_schema)
         if not response:
             raise ValueError("Empty response from Gemini API")
         return response
@@ -41,52 +36,166 @@ def retry_generate_content(prompt):
             print("Rate limit hit, waiting before retry...")
             raise RateLimitException(str(e))
         raise
-    
-def extract_information(resume_txt: str, prompt_key: str) -> dict:
-    """Extracts structured information from resume text using LLM."""
-    # Input validation
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry=retry_if_exception_type(RateLimitException)
+)
+
+async def aretry_generate_content(prompt, response_schema=None):
+    """Async version of retry_generate_content; backoff sleeps don't block the event loop."""
+    try:
+        response = await get_llm_client().agenerate_content(prompt, response_schema=response_schema)
+        if not response:
+            raise ValueError("Empty response from Gemini API")
+        return response
+    except Exception as e:
+        if "429" in str(e) or "Resource has been exhausted" in str(e):
+            print("Rate limit hit, waiting before retry...")
+            raise RateLimitException(str(e))
+        raise
+
+def build_extraction_prompt(resume_txt: str, prompt_key: str, omitted_fields: list[str] | None = None) -> str | None:
+    """Validates the inputs and formats the extraction prompt. Returns None if they are invalid.
+    `omitted_fields` (dotted paths) were extracted locally; the model is told to leave them out."""
     if not resume_txt:
         print("⚠️ Empty resume text provided")
         return None
-        
+
     if prompt_key not in PROMPTS:
         print(f"⚠️ Prompt key '{prompt_key}' not found")
         return None
 
-    # Initialize variables
-    response_text = None
-    parsed_data = None
+    # Shrink the resume text to the token budget before it goes into the prompt
+    budgeted_txt, report = fit_resume_text_to_budget(resume_txt)
+    print(
+        f"📏 Resume text: {report.tokens_before} → {report.tokens_after} tokens (saved {report.tokens_saved}; "
+        f"{report.repeated_lines_removed} repeated, {report.low_value_lines_removed} low-value lines removed"
+        f"{'; truncated' if report.truncated else ''})"
+    )
+    prompt = PROMPTS[prompt_key].format(resume_data=budgeted_txt)
+    if omitted_fields:
+        prompt += (
+            "\n\nIMPORTANT: The following fields were already extracted and must NOT be included in your JSON: "
+            + ", ".join(omitted_fields)
+        )
+    return prompt
 
-    # LLM Communication
+def _is_empty(value) -> bool:
+    return value in (None, "", [], {})
+
+def structure_without_local_fields(structure: dict, local: dict) -> dict:
+    """Returns `structure` without the fields that were already extracted locally (non-empty values in `local`)."""
+    reduced = {}
+    for key, expected_type in structure.items():
+        value = local.get(key)
+        if isinstance(expected_type, dict) and isinstance(value, dict):
+            nested = structure_without_local_fields(expected_type, value)
+            if nested:
+                reduced[key] = nested
+        elif _is_empty(value):
+            reduced[key] = expected_type
+    return reduced
+
+def _local_field_paths(local: dict, prefix: str = "") -> list[str]:
+    """Dotted paths of the non-empty values in `local`, e.g. ['user_info.email', 'languages']."""
+    paths = []
+    for key, value in local.items():
+        if isinstance(value, dict):
+            paths += _local_field_paths(value, f"{prefix}{key}.")
+        elif not _is_empty(value):
+            paths.append(f"{prefix}{key}")
+    return paths
+
+def _extraction_response_schema(structure: dict | None = None) -> dict | None:
+    """Schema requested from the model for extraction calls, or None when structured output is disabled."""
+    if not LLM_STRUCTURED_OUTPUT:
+        return None
+    return RESUME_RESPONSE_SCHEMA if structure is None else structure_to_response_schema(structure)
+
+def _parse_extraction_response(response, structure: dict | None = None) -> dict | None:
+    """Parses and validates the LLM extraction response. Returns None if it is unusable."""
+    if not response:
+        print("⚠️ Empty response from LLM")
+        return None
+
+    response_text = str(response).strip()
+
+    # Response Parsing
     try:
-        prompt = PROMPTS[prompt_key].format(resume_data=resume_txt)
-        response = retry_generate_content(prompt)
-        
-        if not response:
-            print("⚠️ Empty response from LLM")
-            return None
-            
-        response_text = str(response).strip()
-        
-        # Response Parsing
-        try:
-            response_text = clean_json_response(response_text)
-            parsed_data = json.loads(response_text)
-            
-            if not validate_resume_structure(parsed_data):
-                return None
+        parsed_data = parse_json_response(response_text)
 
-            return parsed_data
-            
-        except json.JSONDecodeError as e:
-            print(f"🔴 JSON parsing error: {e}")
-            if response_text:  # Only show response if it exists
-                print(f"Problematic response (500 chars):\n{response_text[:500]}...")
-            return None
-        except Exception as e:
-            print(f"🔴 Unexpected parsing error: {e}")
+        if not validate_resume_structure(parsed_data, structure):
             return None
 
+        return parsed_data
+
+    except json.JSONDecodeError as e:
+        print(f"🔴 JSON parsing error: {e}")
+        if response_text:  # Only show response if it exists
+            print(f"Problematic response (500 chars):\n{response_text[:500]}...")
+        return None
+    except Exception as e:
+        print(f"🔴 Unexpected parsing error: {e}")
+        return None
+
+def usable_response_steps(prompt, response_schema, parse, is_usable=lambda parsed: parsed is not None, response=None, label="extraction"):
+    """Parses the LLM response to `prompt`, re-requesting it (after invalidating the cached copy) while the local
+    repair pass can't make it usable, up to LLM_PARSE_MAX_REREQUESTS times.
+    A generator, so sync and async callers share it and only differ in how they call the LLM (see run_llm_steps):
+    it yields (prompt, response_schema) whenever it needs a response, is sent that response, and returns
+    (parsed, response) with the last attempt. Pass `response` when the first one was already obtained (e.g. streamed)."""
+    if response is None:
+        response = yield prompt, response_schema
+    parsed = parse(response)
+
+    # Re-request only when the local repair pass couldn't save the response
+    for attempt in range(LLM_PARSE_MAX_REREQUESTS):
+        if is_usable(parsed):
+            break
+        print(f"🔁 Re-requesting {label} ({attempt + 1}/{LLM_PARSE_MAX_REREQUESTS}) after an unusable response")
+        get_llm_client().invalidate(prompt, response_schema)
+        response = yield prompt, response_schema
+        parsed = parse(response)
+    return parsed, response
+
+def run_llm_steps(steps, generate=retry_generate_content):
+    """Runs a generator built on usable_response_steps, answering its requests with blocking `generate` calls."""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(generate(*request))
+    except StopIteration as done:
+        return done.value
+
+async def arun_llm_steps(steps, generate=aretry_generate_content):
+    """Async version of run_llm_steps; `generate` is a coroutine function."""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await generate(*request))
+    except StopIteration as done:
+        return done.value
+
+def _extraction_steps(resume_txt: str, prompt_key: str, local: dict):
+    """Builds the extraction request, parses its response and merges the local fields (see usable_response_steps)."""
+    structure = structure_without_local_fields(RESUME_STRUCTURE, local) if local else None
+    prompt = build_extraction_prompt(resume_txt, prompt_key, _local_field_paths(local))
+    if prompt is None:
+        return None
+    parsed_data, _ = yield from usable_response_steps(
+        prompt, _extraction_response_schema(structure), lambda response: _parse_extraction_response(response, structure)
+    )
+    return merge_extracted_sections(parsed_data, local) if parsed_data is not None else None
+
+def extract_information(resume_txt: str, prompt_key: str, local: dict | None = None) -> dict:
+    """Extracts structured information from resume text using LLM.
+    Fields already extracted locally (`local`, e.g. from rule_based_extraction) are left out of the
+    request and merged into the result."""
+    # LLM Communication
+    try:
+        return run_llm_steps(_extraction_steps(resume_txt, prompt_key, local or {}))
     except RateLimitException as e:
         print(f"⏳ Rate limited: {e}")
         return None
@@ -94,6 +203,43 @@ def extract_information(resume_txt: str, prompt_key: str) -> dict:
         print(f"🔥 LLM communication error: {e}")
         return None
 
+async def aextract_information(resume_txt: str, prompt_key: str, local: dict | None = None) -> dict:
+    """Async version of extract_information for callers running on the event loop."""
+    # LLM Communication
+    try:
+        return await arun_llm_steps(_extraction_steps(resume_txt, prompt_key, local or {}))
+    except RateLimitException as e:
+        print(f"⏳ Rate limited: {e}")
+        return None
+    except Exception as e:
+        print(f"🔥 LLM communication error: {e}")
+        return None
+
+def merge_extracted_sections(extracted: dict, local: dict) -> dict:
+    """Overlays values extracted locally (without the LLM) onto the LLM result.
+    Nested dicts are merged key by key; empty local values never overwrite the LLM's."""
+    for key, value in local.items():
+        if isinstance(value, dict) and isinstance(extracted.get(key), dict):
+            merge_extracted_sections(extracted[key], value)
+        elif not _is_empty(value):
+            extracted[key] = value
+    return extracted
+
+def empty_resume_sections() -> dict:
+    """A resume with every section of RESUME_STRUCTURE set to None (nested sections as dicts of None)."""
+    def empty(structure):
+        return {key: empty(value) if isinstance(value, dict) else None for key, value in structure.items()}
+    return empty(RESUME_STRUCTURE)
+
+async def aextract_segmented_information(segmented: SegmentedResume, prompt_key: str = "user_extract_segmented_sections", local: dict | None = None) -> dict:
+    """Extracts structured information from a layout-segmented resume.
+    Sections the layout already provides verbatim are not sent to the LLM and are merged into its result,
+    together with any other locally extracted fields in `local`."""
+    local = merge_extracted_sections(local_sections(segmented), local or {})
+    # Whole sections known locally are replaced by a placeholder; partial ones (user_info) still need their text
+    known_sections = {key for key, value in local.items() if not isinstance(value, dict)}
+    return await aextract_information(format_segmented_text(segmented, exclude=known_sections), prompt_key, local)
+
 
 def clean_json_response(response_text: str) -> str:
     """Extracts JSON from markdown code blocks if present."""
@@ -108,28 +254,121 @@ def clean_json_response(response_text: str) -> str:
     return response_text
 
 
+def repair_json_response(response_text: str) -> str:
+    """Cheap local repair for near-valid JSON: drops text around the object, trailing commas and
+    closes a truncated string or unclosed brackets. Only used after a strict parse has failed."""
+    text = clean_json_response(response_text)
+    start = text.find("{")
+    if start == -1:
+        return text
+    end = text.rfind("}")
+    text = text[start:end + 1] if end > start else text[start:]
+
+    # Trailing commas before a closing bracket
+    text = re.sub(r",\s*([}\]])", r"\1", text)
+
+    # Close whatever is still open (a response cut off mid-way)
+    closers = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r",\s*$", "", text)
+    return text + "".join(reversed(closers))
+
+
+def parse_json_response(response_text: str):
+    """Parses an LLM JSON response, trying the local repair pass before giving up.
+    Raises json.JSONDecodeError if the response can't be recovered."""
+    try:
+        return json.loads(clean_json_response(response_text))
+    except json.JSONDecodeError:
+        repaired = json.loads(repair_json_response(response_text))
+        print("🩹 LLM response parsed after local JSON repair")
+        return repaired
+
+
+# Expected structure of an extracted resume; validate_resume_structure checks it and
+# the structured-output schema sent to the model is derived from it.
+RESUME_STRUCTURE = {
+    "user_info": {
+        "first_name": (str, type(None)),
+        "last_name": (str, type(None)),
+        "email": (str, type(None)),
+        "phone_number": (str, type(None)),
+        "linkedin_profile": (str, type(None)),
+        "address": (str, type(None)),
+    },
+    "summary": (str, type(None)),
+    "skills": {
+        "soft_skills": (list, type(None)),
+        "hard_skills": (list, type(None))
+    },
+    "relevant_work_experience": (list, type(None)),
+    "education": (list, type(None)),
+    "languages": (list, type(None))
+}
+
+# Shape of the items inside each list section (validate_resume_structure only checks that they are lists)
+_OPTIONAL_TEXT = (str, type(None))
+RESUME_LIST_ITEMS = {
+    "soft_skills": str,
+    "hard_skills": str,
+    "relevant_work_experience": {
+        "title": _OPTIONAL_TEXT, "company": _OPTIONAL_TEXT, "start_date": _OPTIONAL_TEXT,
+        "end_date": _OPTIONAL_TEXT, "description": _OPTIONAL_TEXT, "location": _OPTIONAL_TEXT
+    },
+    "education": {
+        "title": _OPTIONAL_TEXT, "institution": _OPTIONAL_TEXT, "type": _OPTIONAL_TEXT,
+        "start_date": _OPTIONAL_TEXT, "end_date": _OPTIONAL_TEXT, "notes": _OPTIONAL_TEXT
+    },
+    "languages": {
+        "language": _OPTIONAL_TEXT, "level": _OPTIONAL_TEXT, "notes": _OPTIONAL_TEXT
+    },
+}
+
+def structure_to_response_schema(structure, list_items: dict = RESUME_LIST_ITEMS, key: str | None = None) -> dict:
+    """Converts a validate_resume_structure-style structure into the JSON schema dict used for structured output."""
+    if isinstance(structure, dict):
+        return {
+            "type": "object",
+            "properties": {
+                name: structure_to_response_schema(value, list_items, name) for name, value in structure.items()
+            },
+            "required": list(structure.keys()),
+        }
+
+    types = structure if isinstance(structure, tuple) else (structure,)
+    schema = {}
+    if list in types:
+        schema["type"] = "array"
+        schema["items"] = structure_to_response_schema(list_items.get(key, str), list_items)
+    else:
+        schema["type"] = "string"
+    if type(None) in types:
+        schema["nullable"] = True
+    return schema
+
+RESUME_RESPONSE_SCHEMA = structure_to_response_schema(RESUME_STRUCTURE)
+
 def validate_resume_structure(data: dict, structure=None) -> bool:
     """Validates resume structure while allowing empty sections."""
     if structure is None:
-        # Define the structure only on initial call
-        structure = {
-            "user_info": {
-                "first_name": (str, type(None)),
-                "last_name": (str, type(None)),
-                "email": (str, type(None)),
-                "phone_number": (str, type(None)),
-                "linkedin_profile": (str, type(None)),
-                "address": (str, type(None)),
-            },
-            "summary": (str, type(None)),
-            "skills": {
-                "soft_skills": (list, type(None)),
-                "hard_skills": (list, type(None))
-            },
-            "relevant_work_experience": (list, type(None)),
-            "education": (list, type(None)),
-            "languages": (list, type(None))
-        }
+        structure = RESUME_STRUCTURE
 
     if not isinstance(data, dict):
         print("⚠️ Top-level data is not a dictionary")
@@ -0,0 +1,189 @@
+# agent/tools/layout_extraction.py
+# Purpose: Layout-aware PDF extraction: reads text with font and position info (page.get_text("dict")), detects
+# section headings and pre-segments the resume so the LLM doesn't have to rediscover its structure.
+import re
+import statistics
+import unicodedata
+from dataclasses import dataclass, field
+from agent.tools.pdf_extraction_service import PDFExtractionReport, open_pdf, pdf_size
+from config import PDF_MAX_PAGES, PDF_MAX_TEXT_TOKENS, CHARS_PER_TOKEN
+
+# Section names as they appear in Spanish and English resumes (normalized: lowercase, no accents)
+SECTION_HEADINGS = {
+    "summary": [
+        "summary", "resumen", "perfil", "acerca de mi", "about", "about me", "sobre mi", "sintesis profesional",
+        "objetivo", "objetivo profesional", "resumen profesional", "perfil profesional", "profile", "professional summary",
+    ],
+    "relevant_work_experience": [
+        "experiencia laboral", "experiencia profesional", "experiencia", "work experience", "experience",
+        "professional experience", "employment history", "historial laboral", "trayectoria profesional",
+    ],
+    "education": [
+        "educacion", "estudios", "estudios academicos", "formacion", "formacion academica", "education", "cursos",
+        "datos academicos", "certificaciones", "certifications", "courses",
+    ],
+    "skills": [
+        "skills", "habilidades", "destrezas", "aptitudes", "conocimientos", "competencias", "competencias tecnicas",
+        "competencias clave", "habilidades tecnicas", "habilidades blandas", "tech", "technical skills", "soft skills",
+    ],
+    "languages": ["idiomas", "idioma", "languages", "language", "lenguas"],
+}
+_HEADING_ALIASES = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+HEADER_SECTION = "header"  # Text before the first heading (name, contact details)
+OTHER_SECTION = "other"    # Text under headings we don't map (projects, references...)
+
+BOLD_FLAG = 16              # PyMuPDF span flag for bold text
+HEADING_SIZE_RATIO = 1.15   # A line this much larger than the body text counts as styled
+MAX_HEADING_WORDS = 5
+
+
+@dataclass
+class LayoutLine:
+    text: str
+    size: float
+    bold: bool
+    alone_in_block: bool
+
+
+@dataclass
+class SegmentedResume:
+    """Resume text split into candidate sections, keyed like the extraction output (plus header/other)."""
+    sections: dict[str, str] = field(default_factory=dict)
+    headings_found: list[str] = field(default_factory=list)
+    report: PDFExtractionReport = field(default_factory=PDFExtractionReport)
+
+    @property
+    def text(self) -> str:
+        """Plain text of every section in reading order, for callers that don't use the segmentation."""
+        return "\n\n".join(self.sections.values())
+
+
+def normalize_heading(text: str) -> str:
+    """Lowercases, strips accents, punctuation and extra spaces so headings compare equal."""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+    ascii_text = re.sub(r"[^\w\s]", " ", ascii_text.lower())
+    return " ".join(ascii_text.split())
+
+def _ordered_blocks(page_dict: dict) -> list[dict]:
+    """Returns the text blocks of a page in reading order, reading a two-column layout column by column."""
+    blocks = [block for block in page_dict.get("blocks", []) if block.get("type") == 0]
+    middle = page_dict.get("width", 0) / 2
+    left = [block for block in blocks if block["bbox"][2] <= middle + 5]
+    right = [block for block in blocks if block["bbox"][0] >= middle - 5]
+    by_position = lambda block: (block["bbox"][1], block["bbox"][0])
+
+    if len(left) < 2 or len(right) < 2:
+        return sorted(blocks, key=by_position)
+
+    # Full-width blocks above the columns (usually the name/contact banner) come first
+    columns_top = min(block["bbox"][1] for block in left + right)
+    spanning = [block for block in blocks if block not in left and block not in right]
+    above = [block for block in spanning if block["bbox"][1] < columns_top]
+    below = [block for block in spanning if block["bbox"][1] >= columns_top]
+    return sorted(above, key=by_position) + sorted(left, key=by_position) + sorted(right, key=by_position) + sorted(below, key=by_position)
+
+def _block_lines(block: dict) -> list[LayoutLine]:
+    lines = []
+    block_lines = block.get("lines", [])
+    for line in block_lines:
+        spans = [span for span in line.get("spans", []) if span.get("text", "").strip()]
+        if not spans:
+            continue
+        text = " ".join("".join(span["text"] for span in line["spans"]).split())
+        bold = all(span.get("flags", 0) & BOLD_FLAG or "bold" in span.get("font", "").lower() for span in spans)
+        lines.append(LayoutLine(text=text, size=max(span.get("size", 0) for span in spans), bold=bool(bold), alone_in_block=len(block_lines) == 1))
+    return lines
+
+def _heading_section(line: LayoutLine, body_size: float) -> str | None:
+    """Returns the section a heading line opens, OTHER_SECTION for an unknown styled heading, or None for body text."""
+    if len(line.text.split()) > MAX_HEADING_WORDS:
+        return None
+    larger = body_size and line.size >= body_size * HEADING_SIZE_RATIO
+    styled = line.bold or larger or (line.text.isupper() and len(line.text) > 3)
+
+    section = _HEADING_ALIASES.get(normalize_heading(line.text))
+    if section and (styled or line.alone_in_block):
+        return section
+    # Unknown headings still end the previous section; require a strong style so bold body text isn't split
+    if larger and line.bold and not line.text.rstrip().endswith((".", ",")):
+        return OTHER_SECTION
+    return None
+
+def extract_segmented_resume(pdf: bytes | str, max_pages: int | None = PDF_MAX_PAGES, max_tokens: int | None = PDF_MAX_TEXT_TOKENS) -> SegmentedResume | None:
+    """Reads the PDF with layout information and splits it into candidate sections. Runs in the worker processes.
+    Stops at the same page and token limits as the plain extractor. Returns None if the PDF can't be read."""
+    resume = SegmentedResume()
+    report = resume.report
+    report.pdf_bytes = pdf_size(pdf)
+    max_chars = max_tokens * CHARS_PER_TOKEN if max_tokens else None
+    chars_read = 0
+    lines = []
+
+    try:
+        doc = open_pdf(pdf)
+        try:
+            report.total_pages = doc.page_count
+            for page_number in range(doc.page_count):
+                if (max_pages and page_number >= max_pages) or (max_chars and chars_read >= max_chars):
+                    report.stopped_early = True
+                    break
+                page_dict = doc.load_page(page_number).get_text("dict")
+                report.pages_read += 1
+                for block in _ordered_blocks(page_dict):
+                    for line in _block_lines(block):
+                        if max_chars and chars_read >= max_chars:
+                            report.stopped_early = True
+                            break
+                        lines.append(line)
+                        chars_read += len(line.text) + 1
+                        report.text_bytes += len(line.text.encode("utf-8")) + 1
+        finally:
+            doc.close()
+    except Exception as e:
+        print(f"Error extrayendo texto de PDF (layout): {e}")
+        return None
+
+    if not lines:
+        return resume
+
+    # Body text size: the size most characters are set in
+    sizes = [round(line.size, 1) for line in lines for _ in range(len(line.text))]
+    body_size = statistics.mode(sizes) if sizes else 0
+
+    current = HEADER_SECTION
+    collected = {}
+    for line in lines:
+        section = _heading_section(line, body_size)
+        if section == OTHER_SECTION and current == HEADER_SECTION:
+            section = None  # Large bold text before any section is the candidate's name, not a heading
+        if section:
+            if section != OTHER_SECTION:
+                resume.headings_found.append(line.text)
+            # Keep headings that carry meaning for the extraction: unknown ones, sub-headings such as
+            # "Habilidades blandas", and a section heading seen for the second time
+            if section in (OTHER_SECTION, "skills") or section in collected:
+                collected.setdefault(section, []).append(line.text)
+            current = section
+            continue
+        collected.setdefault(current, []).append(line.text)
+
+    resume.sections = {section: "\n".join(section_lines) for section, section_lines in collected.items()}
+    return resume
+
+ALREADY_EXTRACTED = "(already extracted)"
+
+def format_segmented_text(resume: SegmentedResume, exclude: set[str] | None = None) -> str:
+    """Formats the sections as tagged blocks for the segmented extraction prompt.
+    Sections in `exclude` are sent as an ALREADY_EXTRACTED placeholder so the model returns null for them."""
+    exclude = exclude or set()
+    return "\n\n".join(
+        f"[{section.upper()}]\n{ALREADY_EXTRACTED if section in exclude else text}"
+        for section, text in resume.sections.items() if text.strip()
+    )
+
+def local_sections(resume: SegmentedResume) -> dict:
+    """Values taken verbatim from the layout, which the LLM doesn't need to extract.
+    The summary is copied as-is by the extraction prompt anyway, so a summary found under its own heading is kept locally."""
+    summary = resume.sections.get("summary", "").strip()
+    return {"summary": " ".join(summary.split())} if summary else {}
@@ -0,0 +1,188 @@
+# agent/tools/pdf_extraction_service.py
+# Purpose: Run PyMuPDF text extraction in a process pool so PDF parsing uses every core and a slow PDF can't block the event loop.
+import os
+import asyncio
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz
+from agent.tools.prompt_budget import PAGE_SEPARATOR
+from config import PDF_EXTRACTION_WORKERS, PDF_EXTRACTION_TIMEOUT_SECONDS, PDF_MAX_PAGES, PDF_MAX_TEXT_TOKENS, CHARS_PER_TOKEN
+
+
+@dataclass
+class PDFExtractionReport:
+    pdf_bytes: int = 0        # Size of the PDF
+    total_pages: int = 0
+    pages_read: int = 0
+    text_bytes: int = 0       # UTF-8 size of the text kept
+    stopped_early: bool = False
+
+    def __str__(self) -> str:
+        return (
+            f"{self.pages_read}/{self.total_pages} pages, {self.text_bytes} text bytes from a {self.pdf_bytes} byte PDF"
+            f"{' (stopped early)' if self.stopped_early else ''}"
+        )
+
+
+def open_pdf(pdf: bytes | str) -> fitz.Document:
+    """Opens a PDF given as bytes or as a file path. A path is read by PyMuPDF page by page instead of being loaded whole."""
+    if isinstance(pdf, (str, os.PathLike)):
+        return fitz.open(pdf, filetype="pdf")
+    return fitz.open(stream=pdf, filetype="pdf")
+
+def pdf_size(pdf: bytes | str) -> int:
+    return os.path.getsize(pdf) if isinstance(pdf, (str, os.PathLike)) else len(pdf)
+
+def iter_pdf_pages(pdf: bytes | str, max_pages: int | None = PDF_MAX_PAGES, max_tokens: int | None = PDF_MAX_TEXT_TOKENS, report: PDFExtractionReport | None = None) -> Iterator[str]:
+    """Yields the text of each page in order, one page at a time.
+
+    Stops after `max_pages` pages or once `max_tokens` (estimated) of text have been yielded; the page
+    that crosses the budget is cut, and later pages are never decoded. `report` is filled in as pages are read.
+    """
+    report = report if report is not None else PDFExtractionReport()
+    report.pdf_bytes = pdf_size(pdf)
+    max_chars = max_tokens * CHARS_PER_TOKEN if max_tokens else None
+    chars_read = 0
+
+    doc = open_pdf(pdf)
+    try:
+        report.total_pages = doc.page_count
+        for page_number in range(doc.page_count):
+            if max_pages and page_number >= max_pages:
+                report.stopped_early = True
+                break
+            if max_chars and chars_read >= max_chars:
+                report.stopped_early = True
+                break
+            page_text = doc.load_page(page_number).get_text()
+            if max_chars and chars_read + len(page_text) > max_chars:
+                page_text = page_text[:max_chars - chars_read]
+                report.stopped_early = True
+            chars_read += len(page_text)
+            report.pages_read += 1
+            report.text_bytes += len(page_text.encode("utf-8"))
+            yield page_text
+    finally:
+        doc.close()
+
+def extract_pdf_text_with_report(pdf: bytes | str, max_pages: int | None = PDF_MAX_PAGES, max_tokens: int | None = PDF_MAX_TEXT_TOKENS) -> tuple[str | None, PDFExtractionReport]:
+    """Extracts the page texts joined with PAGE_SEPARATOR, plus a report of what was read. Runs in the worker processes."""
+    report = PDFExtractionReport()
+    try:
+        text = PAGE_SEPARATOR.join(iter_pdf_pages(pdf, max_pages, max_tokens, report))
+        return (text.strip() or None), report
+    except Exception as e:
+        print(f"Error extrayendo texto de PDF: {e}")
+        return None, report
+
+def extract_pdf_text(pdf: bytes | str, max_pages: int | None = PDF_MAX_PAGES, max_tokens: int | None = PDF_MAX_TEXT_TOKENS) -> str | None:
+    """Extracts the text of the PDF within the page and token limits, joined with PAGE_SEPARATOR."""
+    text, _ = extract_pdf_text_with_report(pdf, max_pages, max_tokens)
+    return text
+
+
+class PDFExtractionService:
+    """Process pool for PDF text extraction with a per-job timeout.
+
+    A job that times out is abandoned and the pool is replaced, so its worker can't stay stuck on a
+    pathological PDF. Jobs that were running in the replaced pool are retried once in the new one.
+    PDFs can be passed as bytes or as a file path; a path is opened by the worker, so the bytes aren't pickled across processes.
+    """
+
+    def __init__(self, max_workers: int = PDF_EXTRACTION_WORKERS, timeout_seconds: float = PDF_EXTRACTION_TIMEOUT_SECONDS, max_pages: int = PDF_MAX_PAGES, max_tokens: int = PDF_MAX_TEXT_TOKENS):
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self.max_tokens = max_tokens
+        self._executor = None
+        self._lock = threading.Lock()
+        # Jobs wait here rather than in the pool's queue, so the timeout only counts time spent extracting
+        self._slots = asyncio.Semaphore(max_workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" keeps the workers clear of the gRPC/event loop state of the web process
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _replace_executor(self, executor: ProcessPoolExecutor):
+        """Kills the workers of `executor` and lets the next job start a fresh pool."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # Another job already replaced it
+            self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        """Runs `func(*args)` in a worker process. Returns None on failure or timeout."""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return await asyncio.wait_for(loop.run_in_executor(executor, func, *args), timeout=self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    print(f"PDF extraction timed out after {self.timeout_seconds}s; restarting the extraction workers")
+                    self._replace_executor(executor)
+                    return None
+                except BrokenProcessPool:
+                    # The pool was replaced (or a worker crashed) while this job was running
+                    self._replace_executor(executor)
+                    if attempt == 0:
+                        continue
+                    print("PDF extraction failed: worker process pool is broken")
+                    return None
+                except Exception as e:
+                    print(f"Error extrayendo texto de PDF: {e}")
+                    return None
+        return None
+
+    async def extract_text(self, pdf: bytes | str) -> str | None:
+        """Extracts the PDF text in a worker process. Returns None on failure or timeout."""
+        result = await self._run(extract_pdf_text_with_report, pdf, self.max_pages, self.max_tokens)
+        if result is None:
+            return None
+        text, report = result
+        print(f"📄 PDF extraído: {report}")
+        return text
+
+    async def extract_segmented(self, pdf: bytes | str):
+        """Layout-aware extraction (see agent.tools.layout_extraction) in a worker process.
+        Returns a SegmentedResume, or None on failure or timeout."""
+        from agent.tools.layout_extraction import extract_segmented_resume  # layout_extraction imports this module
+        segmented = await self._run(extract_segmented_resume, pdf, self.max_pages, self.max_tokens)
+        if segmented is not None:
+            print(f"📄 PDF extraído (layout): {segmented.report}; secciones: {', '.join(segmented.sections) or 'ninguna'}")
+        return segmented
+
+    def shutdown(self):
+        """Stops the worker processes. Called when the app shuts down."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pdf_extraction_service = None
+_pdf_extraction_service_lock = threading.Lock()
+
+def get_pdf_extraction_service() -> PDFExtractionService:
+    """Returns the process-wide PDF extraction service, creating it on first use."""
+    global _pdf_extraction_service
+    with _pdf_extraction_service_lock:
+        if _pdf_extraction_service is None:
+            _pdf_extraction_service = PDFExtractionService()
+        return _pdf_extraction_service
+
+def shutdown_pdf_extraction_service():
+    """Stops the worker processes of the process-wide service, if it was started."""
+    with _pdf_extraction_service_lock:
+        if _pdf_extraction_service is not None:
+            _pdf_extraction_service.shutdown()
@@ -0,0 +1,150 @@
+# agent/tools/prompt_budget.py
+# Purpose: Measure and shrink resume text before it is formatted into an LLM prompt.
+import re
+import threading
+from dataclasses import dataclass
+from config import PROMPT_RESUME_TOKEN_BUDGET, CHARS_PER_TOKEN
+from integration.llm.rate_limiter import estimate_tokens
+
+PAGE_SEPARATOR = "\f"  # extract_pdf_text joins pages with this so page boundaries survive
+EDGE_LINES = 3         # Lines at the top/bottom of each page where headers and footers live
+TRUNCATION_MARKER = "[...]"
+
+# Lines that carry no resume content anywhere: labelled page counters and purely decorative separators
+_LOW_VALUE_LINE_PATTERNS = [
+    re.compile(r"^(p[aá]gina|page|p\.)\s*\d+(\s*(de|of|/)\s*\d+)?$", re.IGNORECASE),
+    re.compile(r"^[^\w]+$"),
+]
+# Bare page numbers ("2", "- 2 -", "2 / 3"); only dropped at the page edges, since in the body
+# the same shape is a year, a grade or a date range
+_EDGE_LOW_VALUE_LINE_PATTERNS = [
+    re.compile(r"^\d+\s*(/|de|of)\s*\d+$", re.IGNORECASE),
+    re.compile(r"^[-–—\s]*\d{1,3}[-–—\s]*$"),
+]
+_PAGE_COUNTER_PATTERNS = [_LOW_VALUE_LINE_PATTERNS[0], *_EDGE_LOW_VALUE_LINE_PATTERNS]
+
+
+@dataclass
+class PromptBudgetReport:
+    tokens_before: int
+    tokens_after: int
+    repeated_lines_removed: int
+    low_value_lines_removed: int
+    truncated: bool
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+_budget_stats = {"texts": 0, "tokens_before": 0, "tokens_after": 0, "truncated": 0}
+_budget_stats_lock = threading.Lock()
+
+def get_budget_stats() -> dict:
+    """Returns cumulative budgeting metrics for this process, including total tokens saved."""
+    with _budget_stats_lock:
+        stats = dict(_budget_stats)
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    return stats
+
+
+def _line_signature(line: str) -> str:
+    """Normalizes a line so 'Página 1' and 'Página 2' style headers/footers compare equal.
+    Digits are only collapsed in page counters: '2015 - 2018' and '2019 - 2021' stay different lines."""
+    normalized = " ".join(line.split())
+    if any(pattern.match(normalized) for pattern in _PAGE_COUNTER_PATTERNS):
+        return re.sub(r"\d+", "#", normalized.lower())
+    return normalized.lower()
+
+def _edge_line_indexes(lines: list[str]) -> set[int]:
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page."""
+    content_indexes = [index for index, line in enumerate(lines) if line.strip()]
+    return set(content_indexes[:EDGE_LINES] + content_indexes[-EDGE_LINES:])
+
+def remove_repeated_page_lines(pages: list[str]) -> tuple[list[str], int]:
+    """Removes header/footer lines repeated at the top or bottom of most pages, keeping the first occurrence."""
+    if len(pages) < 2:
+        return pages, 0
+
+    page_lines = [page.splitlines() for page in pages]
+    signature_pages = {}
+    for page_index, lines in enumerate(page_lines):
+        for line_index in _edge_line_indexes(lines):
+            signature_pages.setdefault(_line_signature(lines[line_index]), set()).add(page_index)
+
+    min_pages = max(2, (len(pages) + 1) // 2)
+    repeated = {signature for signature, found_in in signature_pages.items() if len(found_in) >= min_pages}
+    if not repeated:
+        return pages, 0
+
+    seen = set()
+    removed = 0
+    cleaned_pages = []
+    for lines in page_lines:
+        kept = []
+        edge_indexes = _edge_line_indexes(lines)
+        for line_index, line in enumerate(lines):
+            signature = _line_signature(line) if line_index in edge_indexes else None
+            if signature in repeated:
+                if signature in seen:
+                    removed += 1
+                    continue
+                seen.add(signature)
+            kept.append(line)
+        cleaned_pages.append("\n".join(kept))
+    return cleaned_pages, removed
+
+def _is_low_value_line(line: str, at_page_edge: bool = False) -> bool:
+    patterns = _LOW_VALUE_LINE_PATTERNS + _EDGE_LOW_VALUE_LINE_PATTERNS if at_page_edge else _LOW_VALUE_LINE_PATTERNS
+    return any(pattern.match(line) for pattern in patterns)
+
+def fit_resume_text_to_budget(resume_txt: str, max_tokens: int = PROMPT_RESUME_TOKEN_BUDGET) -> tuple[str, PromptBudgetReport]:
+    """Deduplicates headers/footers, collapses whitespace, drops low-value lines and, if still needed,
+    trims the tail so the resume text fits in `max_tokens`.
+
+    Returns the trimmed text and a report with the token counts before and after.
+    """
+    tokens_before = estimate_tokens(resume_txt)
+    pages, repeated_removed = remove_repeated_page_lines(resume_txt.split(PAGE_SEPARATOR))
+
+    lines = []
+    low_value_removed = 0
+    for page in pages:
+        page_lines = page.splitlines()
+        edge_indexes = _edge_line_indexes(page_lines)
+        for line_index, raw_line in enumerate(page_lines):
+            line = " ".join(raw_line.split())  # Collapse runs of spaces/tabs
+            if not line:
+                # Keep a single blank line between blocks
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            if _is_low_value_line(line, at_page_edge=line_index in edge_indexes):
+                low_value_removed += 1
+                continue
+            lines.append(line)
+        if lines and lines[-1]:
+            lines.append("")  # Page break becomes a blank line
+    text = "\n".join(lines).strip()
+
+    truncated = False
+    if max_tokens and estimate_tokens(text) > max_tokens:
+        # Keep whole lines from the top (contact info, summary and recent experience come first)
+        max_chars = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 1
+        cut = text.rfind("\n", 0, max_chars)
+        text = text[:cut if cut > 0 else max_chars].rstrip() + "\n" + TRUNCATION_MARKER
+        truncated = True
+
+    report = PromptBudgetReport(
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+        repeated_lines_removed=repeated_removed,
+        low_value_lines_removed=low_value_removed,
+        truncated=truncated,
+    )
+    with _budget_stats_lock:
+        _budget_stats["texts"] += 1
+        _budget_stats["tokens_before"] += report.tokens_before
+        _budget_stats["tokens_after"] += report.tokens_after
+        _budget_stats["truncated"] += int(truncated)
+    return text, report
@@ -0,0 +1,28 @@
+# agent/tools/resume_fingerprint.py
+# Purpose: Content fingerprints used to recognize a resume that was already processed.
+import os
+import re
+import hashlib
+import unicodedata
+from config import UPLOAD_CHUNK_BYTES
+
+
+def pdf_fingerprint(pdf: bytes | str) -> str:
+    """SHA-256 of the PDF bytes (or of the file at a path, read in chunks): matches exact re-uploads of the same file."""
+    if not isinstance(pdf, (str, os.PathLike)):
+        return hashlib.sha256(pdf).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf, "rb") as pdf_file:
+        while chunk := pdf_file.read(UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def normalize_resume_text(text: str) -> str:
+    """Lowercases, strips accents and collapses whitespace (including page breaks) so that the same
+    resume re-exported or re-saved as a different PDF produces the same text."""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+    return " ".join(re.sub(r"[^\w@.+/:-]", " ", ascii_text.lower()).split())
+
+def text_fingerprint(text: str) -> str:
+    """SHA-256 of the normalized extracted text: matches near-exact duplicates with different PDF bytes."""
+    return hashlib.sha256(normalize_resume_text(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,146 @@
+# agent/tools/rule_based_extraction.py
+# Purpose: Deterministic extraction of the resume fields that don't need an LLM: contact details (email, phone,
+# LinkedIn) and, when the languages section is cleanly formatted, the candidate's languages.
+import re
+from agent.tools.layout_extraction import SECTION_HEADINGS, normalize_heading
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-zA-Z]{2,}")
+LINKEDIN_PATTERN = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/[\w%-]+/?", re.IGNORECASE)
+PHONE_PATTERN = re.compile(r"(?<![\w/@.])(\+\s?\d{1,3}[\s.-]?)?(\(\d{1,4}\)[\s.-]?)?\d[\d\s.-]{6,}\d(?![\w/])")
+DATE_RANGE_PATTERN = re.compile(r"^(19|20)\d{2}\s*[-–./]\s*(19|20)?\d{2}$")
+MIN_PHONE_DIGITS = 9   # Fewer than this without a country code is more likely a date range or an ID
+MAX_PHONE_DIGITS = 15
+HEADER_LINES = 15      # Contact details are searched here first
+
+# Language names (normalized) found in Spanish and English resumes
+LANGUAGE_NAMES = {
+    "espanol", "castellano", "spanish", "ingles", "english", "frances", "french", "aleman", "german",
+    "italiano", "italian", "portugues", "portuguese", "catalan", "euskera", "gallego", "valenciano",
+    "chino", "mandarin", "chinese", "japones", "japanese", "coreano", "korean", "ruso", "russian",
+    "arabe", "arabic", "holandes", "dutch", "neerlandes", "sueco", "swedish", "hindi", "turco", "turkish",
+}
+
+# Proficiency words mapped to the levels used by the extraction prompt (basic, fluent, proficient, native)
+LANGUAGE_LEVELS = {
+    "native": ["nativo", "nativa", "lengua materna", "materno", "materna", "bilingue", "native", "mother tongue", "bilingual"],
+    "proficient": ["avanzado", "avanzada", "profesional", "dominio", "experto", "advanced", "proficient", "professional", "c1", "c2"],
+    "fluent": ["fluido", "fluida", "intermedio", "intermedia", "conversacional", "fluent", "intermediate", "conversational", "b1", "b2"],
+    "basic": ["basico", "basica", "elemental", "principiante", "basic", "beginner", "elementary", "a1", "a2"],
+}
+CERTIFICATE_PATTERN = re.compile(r"\b(TOEFL|TOEIC|IELTS|Cambridge|First Certificate|FCE|CAE|CPE|DELF|DALF|DELE|Goethe|TestDaF|HSK|JLPT)\b[^,;)]*", re.IGNORECASE)
+CEFR_PATTERN = re.compile(r"\b([ABC][12])\b")
+ITEM_SEPARATORS = re.compile(r"[;|•·▪●\n]")
+
+_LANGUAGE_HEADINGS = set(SECTION_HEADINGS["languages"])
+_ALL_HEADINGS = {alias for aliases in SECTION_HEADINGS.values() for alias in aliases}
+
+
+def _phone_candidates(text: str) -> list[str]:
+    phones = []
+    for match in PHONE_PATTERN.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        has_country_code = candidate.startswith("+")
+        if DATE_RANGE_PATTERN.match(candidate) or len(digits) > MAX_PHONE_DIGITS:
+            continue
+        if len(digits) >= MIN_PHONE_DIGITS or (has_country_code and len(digits) >= 8):
+            phones.append(" ".join(candidate.split()))
+    return phones
+
+def extract_contact_info(text: str) -> dict:
+    """Returns the email, phone number and LinkedIn profile found in the text (only the fields that were found)."""
+    header = "\n".join(text.splitlines()[:HEADER_LINES])
+    contact = {}
+
+    emails = EMAIL_PATTERN.findall(header) or EMAIL_PATTERN.findall(text)
+    if emails:
+        contact["email"] = emails[0]
+
+    linkedin = LINKEDIN_PATTERN.search(header) or LINKEDIN_PATTERN.search(text)
+    if linkedin:
+        profile = linkedin.group(0).rstrip("/")
+        contact["linkedin_profile"] = profile if profile.lower().startswith("http") else f"https://{profile}"
+
+    # Emails and URLs contain digit runs that look like phone numbers
+    without_links = LINKEDIN_PATTERN.sub(" ", EMAIL_PATTERN.sub(" ", header))
+    phones = _phone_candidates(without_links) or _phone_candidates(LINKEDIN_PATTERN.sub(" ", EMAIL_PATTERN.sub(" ", text)))
+    if phones:
+        contact["phone_number"] = phones[0]
+
+    return contact
+
+def find_languages_section(text: str, max_lines: int = 10) -> str | None:
+    """Returns the lines under a languages heading in plain text, or None if there is no such heading."""
+    lines = text.splitlines()
+    for index, line in enumerate(lines):
+        heading, _, inline_items = line.partition(":")
+        if normalize_heading(heading) not in _LANGUAGE_HEADINGS:
+            continue
+        section_lines = [inline_items] if inline_items.strip() else []
+        for following in lines[index + 1:index + 1 + max_lines]:
+            if not following.strip():
+                if section_lines:
+                    break
+                continue
+            if normalize_heading(following.partition(":")[0]) in _ALL_HEADINGS:
+                break
+            section_lines.append(following)
+        return "\n".join(section_lines)
+    return None
+
+def _parse_language_item(item: str) -> dict | None:
+    """Parses one entry such as 'Inglés - Avanzado (C1, TOEFL 105)'. Returns None if it names no known language."""
+    words = normalize_heading(item).split()
+    language = next((word for word in words if word in LANGUAGE_NAMES), None)
+    if not language:
+        return None
+
+    original_words = re.findall(r"[^\W\d_]+", item)
+    name = next((word for word in original_words if normalize_heading(word) == language), language)
+
+    normalized = f" {' '.join(words)} "
+    level = next(
+        (level for level, level_words in LANGUAGE_LEVELS.items() if any(f" {word} " in normalized for word in level_words)),
+        None,
+    )
+    notes = [match.group(0).strip() for match in CEFR_PATTERN.finditer(item)]
+    notes += [match.group(0).strip() for match in CERTIFICATE_PATTERN.finditer(item)]
+    return {"language": name.capitalize(), "level": level, "notes": ", ".join(notes) or None}
+
+def extract_languages(section_text: str) -> tuple[list[dict], bool]:
+    """Parses a languages section. Returns the languages found and whether every entry in the section was understood."""
+    languages = []
+    complete = True
+    for chunk in ITEM_SEPARATORS.split(section_text):
+        if not chunk.strip():
+            continue
+        # "Inglés (C1), Francés (B1)": split on commas only when they separate languages
+        parts = chunk.split(",")
+        if sum(1 for part in parts if any(word in LANGUAGE_NAMES for word in normalize_heading(part).split())) < 2:
+            parts = [chunk]
+        for part in parts:
+            if not part.strip():
+                continue
+            parsed = _parse_language_item(part)
+            if parsed is None:
+                complete = False
+            else:
+                languages.append(parsed)
+    return languages, complete and bool(languages)
+
+def extract_rule_based_sections(text: str, languages_text: str | None = None) -> dict:
+    """Extracts contact details and, if the languages section is fully understood, the languages.
+    Returns a partial resume dict (same keys as the LLM extraction) holding only what was found."""
+    sections = {}
+    contact = extract_contact_info(text)
+    if contact:
+        sections["user_info"] = contact
+
+    languages_text = languages_text if languages_text is not None else find_languages_section(text)
+    if languages_text:
+        languages, complete = extract_languages(languages_text)
+        # A partially understood section is left to the LLM so no language is lost
+        if complete:
+            sections["languages"] = languages
+
+    return sections
@@ -0,0 +1,82 @@
+# agent/tools/streaming_json.py
+# Purpose: Parse a JSON object incrementally as an LLM streams it, emitting each top-level member as soon as it is complete.
+import json
+
+
+class IncrementalJSONObjectParser:
+    """Incremental parser for a single top-level JSON object.
+
+    Feed it text chunks as they arrive; every call returns the (key, value) pairs whose values
+    finished in that chunk. Anything before the first '{' (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0             # Next character of the buffer to scan
+        self._depth = 0           # Nesting depth; 1 means we're directly inside the top-level object
+        self._in_string = False
+        self._escaped = False
+        self._member_start = None # Buffer index where the current top-level member begins
+        self.started = False
+        self.completed = False
+        self.failed_members = 0   # Members that could not be parsed on their own
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Adds a chunk of text and returns the top-level members completed by it."""
+        if self.completed or not chunk:
+            return []
+        self._buffer += chunk
+        members = []
+
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    members.extend(self._finish_member(self._pos))
+                    self.completed = True
+                    self._pos += 1
+                    break
+            elif char == "," and self._depth == 1:
+                members.extend(self._finish_member(self._pos))
+                self._member_start = self._pos + 1
+
+            self._pos += 1
+
+        return members
+
+    def _finish_member(self, end: int) -> list[tuple[str, object]]:
+        """Parses the `"key": value` text between the current member start and `end`."""
+        member_text = self._buffer[self._member_start:end].strip()
+        if not member_text:
+            return []
+        try:
+            return list(json.loads("{" + member_text + "}").items())
+        except json.JSONDecodeError:
+            self.failed_members += 1
+            return []
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._buffer
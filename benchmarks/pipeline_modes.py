@@ -0,0 +1,102 @@
+# benchmarks/pipeline_modes.py
+# Purpose: Compare the "two_call" and "fused" resume pipelines on a set of PDFs (LLM latency and output quality).
+#
+# Usage: python -m benchmarks.pipeline_modes path/to/cv1.pdf path/to/cv2.pdf ... [--runs 3]
+# The response cache is disabled by default so every run reaches the model; set LLM_CACHE_ENABLED=true to override.
+import os
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import config
+from agent.tools.information_extraction import get_resume_text_from_pdf, aextract_information, validate_resume_structure
+from agent.tools.general_feedback import generate_llm_feedback, aextract_and_analyze, FEEDBACK_SECTIONS
+
+LIST_SECTIONS = ["relevant_work_experience", "education", "languages"]
+
+
+def feedback_is_complete(feedback) -> bool:
+    """True when every feedback section has a non-empty feedback and example."""
+    if not isinstance(feedback, dict) or "error" in feedback:
+        return False
+    return all(
+        isinstance(feedback.get(section), dict) and feedback[section].get("feedback") and feedback[section].get("example")
+        for section in FEEDBACK_SECTIONS
+    )
+
+def sections_agreement(reference: dict | None, candidate: dict | None) -> float | None:
+    """Share of user_info fields and list-section item counts where both pipelines agree."""
+    if not reference or not candidate:
+        return None
+    checks = [
+        (reference.get("user_info") or {}).get(field) == (candidate.get("user_info") or {}).get(field)
+        for field in (reference.get("user_info") or {})
+    ]
+    checks += [len(reference.get(section) or []) == len(candidate.get(section) or []) for section in LIST_SECTIONS]
+    return sum(checks) / len(checks) if checks else None
+
+async def run_two_call(text: str) -> tuple[dict | None, dict | None, float]:
+    started_at = time.perf_counter()
+    sections = await aextract_information(text, "user_extract_all_sections")
+    feedback = await generate_llm_feedback({"content": sections}) if sections else None
+    return sections, feedback, time.perf_counter() - started_at
+
+async def run_fused(text: str) -> tuple[dict | None, dict | None, float]:
+    started_at = time.perf_counter()
+    sections, feedback = await aextract_and_analyze(text)
+    return sections, feedback, time.perf_counter() - started_at
+
+async def benchmark(pdf_paths: list[str], runs: int):
+    modes = {"two_call": run_two_call, "fused": run_fused}
+    results = {mode: {"latency": [], "valid_sections": 0, "complete_feedback": 0, "runs": 0} for mode in modes}
+    agreement = []
+
+    for pdf_path in pdf_paths:
+        with open(pdf_path, "rb") as f:
+            text = get_resume_text_from_pdf(f.read())
+        if not text:
+            print(f"Skipping {pdf_path}: no text extracted")
+            continue
+
+        for run in range(runs):
+            outputs = {}
+            for mode, run_mode in modes.items():
+                sections, feedback, elapsed = await run_mode(text)
+                outputs[mode] = sections
+                stats = results[mode]
+                stats["runs"] += 1
+                stats["latency"].append(elapsed)
+                stats["valid_sections"] += int(sections is not None and validate_resume_structure(sections))
+                stats["complete_feedback"] += int(feedback_is_complete(feedback))
+                print(f"{os.path.basename(pdf_path)} run {run + 1} {mode}: {elapsed:.2f}s")
+
+            score = sections_agreement(outputs["two_call"], outputs["fused"])
+            if score is not None:
+                agreement.append(score)
+
+    print(f"\n{'mode':<10} {'runs':>5} {'p50 (s)':>8} {'mean (s)':>9} {'max (s)':>8} {'valid':>7} {'feedback':>9}")
+    for mode, stats in results.items():
+        if not stats["runs"]:
+            continue
+        latency = stats["latency"]
+        print(
+            f"{mode:<10} {stats['runs']:>5} {statistics.median(latency):>8.2f} {statistics.mean(latency):>9.2f} "
+            f"{max(latency):>8.2f} {stats['valid_sections'] / stats['runs']:>7.0%} {stats['complete_feedback'] / stats['runs']:>9.0%}"
+        )
+    if agreement:
+        print(f"\nExtraction agreement between modes (user_info fields + section item counts): {statistics.mean(agreement):.0%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the two_call and fused resume pipelines.")
+    parser.add_argument("pdf_paths", nargs="+", help="Resume PDFs to run through both pipelines")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per PDF and mode")
+    args = parser.parse_args(argv)
+
+    config.load_all_prompts()
+    asyncio.run(benchmark(args.pdf_paths, args.runs))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -45,16 +45,112 @@ UUID_COLLECTION = "emails_to_uuids"
 RESUME_COLLECTION = "resumes"
 SECTIONS_COLLECTION = "sections"
 HR_COLLECTION = "hr_users"
+FINGERPRINT_COLLECTION = "resume_fingerprints"
+CHECKPOINT_COLLECTION = "resume_checkpoints"
+# Dashboard copy of the feedback resumes awaiting HR review, and their per-status counts (one document)
+REVIEW_QUEUE_COLLECTION = "review_queue"
+REVIEW_QUEUE_COUNTS_DOC = "review_queue_stats/counts"
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# --- LLM ---
+LLM_MODEL_NAME = os.environ.get("LLM_MODEL_NAME", "gemini-2.0-flash-thinking-exp-01-21")
+# Maximum number of concurrent in-flight async requests per LLM client
+LLM_MAX_CONCURRENT_REQUESTS = int(os.environ.get("LLM_MAX_CONCURRENT_REQUESTS", "8"))
+# Persistent response cache (keyed by SHA-256 of model name + prompt)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "data/cache/llm_responses.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+# Process-wide quota shared by every LLM caller (match these to the model's published limits)
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "1000000"))
+# Backend selection: "gemini" calls the API, "replay" serves responses recorded on disk (no network or quota)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+LLM_REPLAY_DIR = os.environ.get("LLM_REPLAY_DIR", "data/llm_replay")
+LLM_REPLAY_LATENCY_SECONDS = float(os.environ.get("LLM_REPLAY_LATENCY_SECONDS", "0"))
+# When set, every successful Gemini response is also recorded here for later replay
+LLM_RECORD_DIR = os.environ.get("LLM_RECORD_DIR")
+# Stream the resume analysis and hand each feedback section downstream as soon as it is complete
+LLM_STREAM_FEEDBACK = os.environ.get("LLM_STREAM_FEEDBACK", "true").lower() == "true"
+# Ask the model for schema-constrained JSON; unusable responses are repaired locally before re-requesting.
+# On by default only for models that accept response_schema (the experimental "thinking" models reject it)
+LLM_STRUCTURED_OUTPUT = os.environ.get("LLM_STRUCTURED_OUTPUT", str("thinking" not in LLM_MODEL_NAME)).lower() == "true"
+LLM_PARSE_MAX_REREQUESTS = int(os.environ.get("LLM_PARSE_MAX_REREQUESTS", "1"))
+# Characters per token assumed by every local token estimate (quota accounting, prompt budget, PDF text limits)
+CHARS_PER_TOKEN = int(os.environ.get("CHARS_PER_TOKEN", "4"))
+# Maximum estimated tokens of resume text sent in a prompt (after header/footer dedup and cleanup)
+PROMPT_RESUME_TOKEN_BUDGET = int(os.environ.get("PROMPT_RESUME_TOKEN_BUDGET", "6000"))
+# "two_call" extracts the sections and then analyzes them in a second request; "fused" does both in one request
+RESUME_PIPELINE_MODE = os.environ.get("RESUME_PIPELINE_MODE", "two_call")
+
+# --- PDF extraction ---
+# PDF parsing runs in a process pool so it uses every core and never blocks the event loop
+PDF_EXTRACTION_WORKERS = int(os.environ.get("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# A PDF that takes longer than this is abandoned and its worker process replaced
+PDF_EXTRACTION_TIMEOUT_SECONDS = float(os.environ.get("PDF_EXTRACTION_TIMEOUT_SECONDS", "30"))
+# Pages beyond this are not parsed
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "20"))
+# Extraction stops once this many estimated tokens of text have been read (the prompt budget trims the rest)
+PDF_MAX_TEXT_TOKENS = int(os.environ.get("PDF_MAX_TEXT_TOKENS", str(PROMPT_RESUME_TOKEN_BUDGET * 2)))
+# "plain" sends the flat page text to the LLM; "layout" uses font size/weight and position to pre-segment it into sections
+PDF_EXTRACTION_MODE = os.environ.get("PDF_EXTRACTION_MODE", "plain")
+# Reuse the extraction and feedback of a previously processed resume with the same PDF bytes or the same normalized text
+DUPLICATE_DETECTION_ENABLED = os.environ.get("DUPLICATE_DETECTION_ENABLED", "true").lower() == "true"
+
+# --- Uploads ---
+# Uploaded PDFs are copied in chunks to a temporary file; anything larger than this is rejected as soon as it's seen
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Directory for the copies; it must survive restarts, since queued jobs read the PDF from it
+UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR", "data/uploads")
+
+# --- Job queue ---
+# Resume processing runs as persistent jobs instead of FastAPI background tasks
+JOB_QUEUE_BACKEND = os.environ.get("JOB_QUEUE_BACKEND", "sqlite")
+JOB_QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "data/queue/jobs.sqlite3")
+# Concurrent jobs per worker process
+JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", "2"))
+# Start workers inside the web process; set to false when running `python -m agent.core.job_workers` separately
+JOB_WORKERS_IN_WEB_PROCESS = os.environ.get("JOB_WORKERS_IN_WEB_PROCESS", "true").lower() == "true"
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "2"))
+# Attempts before a job is dead-lettered; retries wait JOB_RETRY_BASE_SECONDS * 2^(attempt - 1), up to JOB_RETRY_MAX_SECONDS
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "4"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", "900"))
+# A running job whose worker stops renewing its lease for this long is handed to another worker
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+# Uploads are refused while this many jobs are waiting (backpressure)
+JOB_QUEUE_MAX_PENDING = int(os.environ.get("JOB_QUEUE_MAX_PENDING", "500"))
+
+# --- Plan execution (agent/core/planning.py) ---
+# Outputs of deterministic plan actions are reused when the same action runs on the same inputs
+PLAN_CACHE_ENABLED = os.environ.get("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_PATH = os.environ.get("PLAN_CACHE_PATH", "data/cache/plan_actions.sqlite3")
+
+# --- Drive batch ingestion ---
+# Drive downloads in flight at once across the job workers of a process (each download is held in memory)
+DRIVE_MAX_CONCURRENT_DOWNLOADS = int(os.environ.get("DRIVE_MAX_CONCURRENT_DOWNLOADS", "8"))
+
+# --- Firestore document cache (agent/memory/user_db/doc_cache.py) ---
+# In-process read-through cache for user, email and resume documents. Writes made through this process invalidate
+# the cached copy; the TTLs bound how stale a document written by another process (e.g. a separate job worker) can be.
+DOC_CACHE_ENABLED = os.environ.get("DOC_CACHE_ENABLED", "true").lower() == "true"
+USER_DOC_CACHE_TTL_SECONDS = float(os.environ.get("USER_DOC_CACHE_TTL_SECONDS", "60"))
+EMAIL_UUID_CACHE_TTL_SECONDS = float(os.environ.get("EMAIL_UUID_CACHE_TTL_SECONDS", "600"))  # The email -> uuid mapping never changes
+RESUME_DOC_CACHE_TTL_SECONDS = float(os.environ.get("RESUME_DOC_CACHE_TTL_SECONDS", "30"))
+# Documents kept per collection (least recently used are evicted first)
+DOC_CACHE_MAX_ENTRIES = int(os.environ.get("DOC_CACHE_MAX_ENTRIES", "1000"))
+
 
 PROMPTS = {}
 
 prompt_files = {
     "user_extract_all_sections": ("extraction", "user_all_sections_extraction_v2.txt"),
+    "user_extract_segmented_sections": ("extraction", "user_segmented_sections_extraction_v1.txt"),
     "resume_analysis": ("analysis", "entire_resume_analyzer_prompt_v7.txt"),
+    "fused_extract_and_analyze": ("analysis", "fused_extraction_analysis_v1.txt"),
     "email_format": ("output_formatting", "email_format_generator_v1.txt"),
     "resume_generator": ("resume_generation", "resume_generator.txt"),
     "questions_for_users": ("user_interaction", "q_for_users_v1.txt")
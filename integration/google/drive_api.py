@@ -1,6 +1,7 @@
 # integration/google/drive_api.py 
 import io
 import os.path
+import threading
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -11,6 +12,8 @@ import google.auth # Use the main google-auth library
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError # Good to import for error handling
+from googleapiclient.http import MediaIoBaseDownload
+from config import UPLOAD_CHUNK_BYTES
 
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
@@ -92,75 +95,100 @@ def build_google_service(service_name: str, version: str, credentials):
         with open('token.json', 'w') as token:
             token.write(creds.to_json())
     return build('drive', 'v3', credentials = creds)
+"""
 
-def get_folder_id(folder_path):
-    #Gets the ID of a folder by its full path in Google Drive.Args: Folder_path: The path to the folder (e.g., "Parent Folder/Subfolder/Target Folder"). Returns: The ID of the target folder (or None if not found).
 
-    parent_id = 'root'  # Start at the root of the Drive
-    folder_names = folder_path.split('/')
+# --- Drive files ---
+# googleapiclient services are not thread-safe (each holds its own httplib2 connection), so every thread gets its own.
+_thread_local = threading.local()
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+DRIVE_PAGE_SIZE = 1000  # Maximum allowed by files.list
 
-    for folder_name in folder_names:
+def get_drive_service():
+    """Returns the Drive v3 service of the calling thread, building it on first use."""
+    service = getattr(_thread_local, "drive_service", None)
+    if service is None:
+        service = build_google_service("drive", "v3", get_google_api_credentials())
+        _thread_local.drive_service = service
+    return service
+
+def get_folder_id(folder_path):
+    """Gets the ID of a folder by its full path in Google Drive (e.g. "Parent Folder/Subfolder/Target Folder").
+    Returns the ID of the target folder, or None if not found."""
+    parent_id = 'root'  # Start at the root of the Drive
+    for folder_name in folder_path.strip("/").split('/'):
+        escaped_name = folder_name.replace("\\", "\\\\").replace("'", "\\'")
         try:
-            query = f"name='{folder_name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder'"
-            results = service.files().list(
-                q=query,
-                fields="files(id)"
+            results = get_drive_service().files().list(
+                q=f"name='{escaped_name}' and '{parent_id}' in parents and mimeType='{FOLDER_MIME_TYPE}' and trashed=false",
+                fields="files(id)",
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
             ).execute()
-            items = results.get('files', [])
-            if not items:
-                print(f"Could not find folder: {folder_name}")
-                return None  # Folder not found at this level
-            parent_id = items[0]['id']  # Update parent_id for the next level
         except HttpError as error:
             print(f"An error occurred: {error}")
             return None
-
+        items = results.get('files', [])
+        if not items:
+            print(f"Could not find folder: {folder_name}")
+            return None  # Folder not found at this level
+        parent_id = items[0]['id']  # Update parent_id for the next level
     return parent_id  # This is the ID of the final folder in the path
-    
-def list_files_in_folder(folder_id):
-    #Lists the files in a given folder. Args: Folder_id: The ID of the folder. Returns: A list of file objects (or [] if an error occurs).
-    try:
-        results = service.files().list(
-            q = f"'{folder_id}' in parents",
-            fields = "files(id, name)"
+
+def iter_files_in_folder(folder_id, mime_type: str | None = None):
+    """Yields the files ({"id", "name", "size", "mimeType"}) in a folder, one page of DRIVE_PAGE_SIZE at a time."""
+    query = f"'{folder_id}' in parents and trashed=false"
+    if mime_type:
+        query += f" and mimeType='{mime_type}'"
+    page_token = None
+    while True:
+        results = get_drive_service().files().list(
+            q=query,
+            fields="nextPageToken, files(id, name, size, mimeType)",
+            pageSize=DRIVE_PAGE_SIZE,
+            pageToken=page_token,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True,
         ).execute()
-        items = results.get('files', [])
-        return items
+        yield from results.get('files', [])
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return
+
+def list_files_in_folder(folder_id, mime_type: str | None = None):
+    """Lists every file in a folder (all pages). Returns [] if an error occurs."""
+    try:
+        return list(iter_files_in_folder(folder_id, mime_type))
     except HttpError as e:
         print(f"An error in listing the files in folder ocurred: {e}")
         return []
 
+def download_file_bytes(file_id, max_bytes: int | None = None) -> bytes:
+    """Downloads a file into memory. Raises ValueError if it is larger than `max_bytes`: the declared size is checked
+    before downloading, and the download goes in UPLOAD_CHUNK_BYTES chunks so it stops soon after passing the limit."""
+    if max_bytes:
+        metadata = get_drive_service().files().get(fileId=file_id, fields="size", supportsAllDrives=True).execute()
+        if int(metadata.get("size") or 0) > max_bytes:
+            raise ValueError(f"File {file_id} is larger than {max_bytes} bytes")
+    request = get_drive_service().files().get_media(fileId=file_id, supportsAllDrives=True)
+    buffer = io.BytesIO()
+    downloader = MediaIoBaseDownload(buffer, request, chunksize=UPLOAD_CHUNK_BYTES)
+    done = False
+    while not done:
+        _, done = downloader.next_chunk()
+        if max_bytes and buffer.tell() > max_bytes:
+            raise ValueError(f"File {file_id} is larger than {max_bytes} bytes")
+    return buffer.getvalue()
+
 def download_file(file_id, file_name, download_dir = "data/resumes"):
-    #Downloads a file from Google Drive. Args: file_id: The ID of the file to download. file_name: The name of the file. download_dir: The directory to save the file to.
+    """Downloads a file from Google Drive into `download_dir`. Returns the path of the file, or None on error."""
     try:
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
-        request = service.files().get_media(fileId = file_id)
-        file_path = os.path.join(download_dir, file_name)
-
-        with io.FileIO(file_path, 'wb') as fh:
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            print(f"Download {int(status.progress() * 100)}%.")
+        os.makedirs(download_dir, exist_ok=True)
+        file_path = os.path.join(download_dir, os.path.basename(file_name))
+        with open(file_path, 'wb') as fh:
+            fh.write(download_file_bytes(file_id))
         print(f"file '{file_name}' downloaded to '{file_path}'")
+        return file_path
     except HttpError as e:
         print(f"An error occurren while downloading the file {file_name}: {e}")
-
-def number_files_in_drive(drive_folder_id):
-    try:
-        files = list_files_in_folder(drive_folder_id)
-        if not files:
-            print("No files found in the Google Drive folder.")
-
-        total_files = len(files)
-        return files, total_files
-    
-    except Exception as e:
-            print(f"An error occurred when processing de number of files at folder id: {drive_folder_id} from Drive: {str(e)}")
-            return None
-    
-# Changes: Ensure consistent use of the service object. You might want to make this a class GoogleDriveClient that gets initialized with credentials and holds the service object. Ensure correct import paths for googleapiclient, etc.
-"""
-
+        return None
@@ -1,25 +1,192 @@
 #api_integration/gemini_api.py
 import os
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator
 import google.generativeai as genai
 from dotenv import load_dotenv
+from config import LLM_MODEL_NAME, LLM_MAX_CONCURRENT_REQUESTS, LLM_CACHE_ENABLED, LLM_RECORD_DIR
+from integration.llm.llm_interface import LLMInterface, request_fingerprint
+from integration.llm.response_cache import ResponseCache, get_response_cache
+from integration.llm.rate_limiter import RateLimiter, get_rate_limiter, estimate_tokens
+from integration.llm.replay_api import record_response
 
-class GeminiAPI:
-    def __init__(self):
+_STREAM_END = object()  # Put on an astream_content queue once the whole response was read
+
+_genai_configured = False
+_genai_configure_lock = threading.Lock()
+
+def configure_gemini():
+    """Loads the API key and configures the SDK once per process."""
+    global _genai_configured
+    with _genai_configure_lock:
+        if _genai_configured:
+            return
         load_dotenv()
-        self.api_key = os.environ.get("GEMINI_API_KEY")
-        if not self.api_key:
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set.")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-thinking-exp-01-21')  # Or your preferred model
+        genai.configure(api_key=api_key)
+        _genai_configured = True
+
+class GeminiAPI(LLMInterface):
+    def __init__(self, model_name: str = LLM_MODEL_NAME, max_concurrent_requests: int = LLM_MAX_CONCURRENT_REQUESTS, cache: ResponseCache | None = None, rate_limiter: RateLimiter | None = None):
+        configure_gemini()
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(self.model_name)
+        # Caps how many async requests this client keeps in flight at once; extra callers wait their turn
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        # Responses are reused across retries and duplicate submissions of the same prompt
+        self.cache = cache if cache is not None else (get_response_cache() if LLM_CACHE_ENABLED else None)
+        # Shared quota so bursts queue here instead of tripping 429s at the API
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    @staticmethod
+    def _total_tokens(response) -> int | None:
+        """Returns the token count reported by the API for a response, if any."""
+        usage = getattr(response, "usage_metadata", None)
+        return getattr(usage, "total_token_count", None) if usage else None
+
+    @staticmethod
+    def _generation_config(response_schema: dict | None) -> dict | None:
+        """Requests schema-constrained JSON output when a response schema is given."""
+        if response_schema is None:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": response_schema}
 
-    def generate_content(self, prompt):
+    def _cached(self, request_text: str) -> str | None:
+        return self.cache.get(self.model_name, request_text) if self.cache else None
+
+    def _store(self, request_text: str, text: str):
+        """Saves a successful response to the cache and, when enabled, to the replay recordings."""
+        if not text:
+            return
+        if self.cache:
+            self.cache.set(self.model_name, request_text, text)
+        if LLM_RECORD_DIR:
+            record_response(LLM_RECORD_DIR, self.model_name, request_text, text)
+
+    def invalidate(self, prompt, response_schema=None):
+        """Drops the cached response for this request so the next call goes to the model."""
+        if self.cache:
+            self.cache.delete(self.model_name, request_fingerprint(prompt, response_schema))
+
+    def generate_content(self, prompt, response_schema=None):
         """Generates content using the Gemini API based on the given prompt.
         Args:
             prompt: The text prompt to send to the Gemini API.
+            response_schema: Optional JSON schema the response must follow.
             Returns: The generated text response from the Gemini API."""
+        request_text = request_fingerprint(prompt, response_schema)
+        cached = self._cached(request_text)
+        if cached is not None:
+            return cached
+        reserved_tokens = estimate_tokens(prompt)
+        self.rate_limiter.acquire(reserved_tokens)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            response = self.model.generate_content(prompt, generation_config=self._generation_config(response_schema))
+            text = response.text
         except Exception as e:
             print(f"Error generating content: {e}")  # Log the error
             return None
+        self.rate_limiter.record_usage(reserved_tokens, self._total_tokens(response))
+        self._store(request_text, text)
+        return text
+
+    async def agenerate_content(self, prompt, response_schema=None):
+        """Async version of generate_content; awaits the SDK's native async call so the event loop keeps serving requests.
+        Args:
+            prompt: The text prompt to send to the Gemini API.
+            response_schema: Optional JSON schema the response must follow.
+            Returns: The generated text response from the Gemini API."""
+        request_text = request_fingerprint(prompt, response_schema)
+        cached = await asyncio.to_thread(self._cached, request_text)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            reserved_tokens = estimate_tokens(prompt)
+            await self.rate_limiter.aacquire(reserved_tokens)
+            try:
+                response = await self.model.generate_content_async(prompt, generation_config=self._generation_config(response_schema))
+                text = response.text
+            except Exception as e:
+                print(f"Error generating content: {e}")  # Log the error
+                return None
+        self.rate_limiter.record_usage(reserved_tokens, self._total_tokens(response))
+        await asyncio.to_thread(self._store, request_text, text)
+        return text
+
+    def stream_content(self, prompt, response_schema=None) -> Iterator[str]:
+        """Yields the Gemini response text chunk by chunk. A cached response is yielded as a single chunk.
+        Raises if the stream fails midway, so partial text is never mistaken for a complete response."""
+        request_text = request_fingerprint(prompt, response_schema)
+        cached = self._cached(request_text)
+        if cached is not None:
+            yield cached
+            return
+        reserved_tokens = estimate_tokens(prompt)
+        self.rate_limiter.acquire(reserved_tokens)
+        chunks = []
+        try:
+            response = self.model.generate_content(prompt, generation_config=self._generation_config(response_schema), stream=True)
+            for chunk in response:
+                chunks.append(chunk.text)
+                yield chunk.text
+        except Exception as e:
+            print(f"Error streaming content: {e}")  # Log the error
+            raise
+        self.rate_limiter.record_usage(reserved_tokens, self._total_tokens(response))
+        self._store(request_text, "".join(chunks))
+
+    async def astream_content(self, prompt, response_schema=None) -> AsyncIterator[str]:
+        """Async version of stream_content. The response is read by a background task into a queue, so the concurrency
+        slot is held only while the model streams, never while a slow consumer works on the chunks.
+        Raises the stream's error if it fails midway."""
+        request_text = request_fingerprint(prompt, response_schema)
+        cached = await asyncio.to_thread(self._cached, request_text)
+        if cached is not None:
+            yield cached
+            return
+        chunks = asyncio.Queue()
+        reader = asyncio.create_task(self._read_stream(prompt, response_schema, request_text, chunks))
+        finished = False
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _STREAM_END:
+                    finished = True
+                    return
+                if isinstance(chunk, Exception):
+                    finished = True
+                    raise chunk
+                yield chunk
+        finally:
+            if not finished:
+                reader.cancel()  # The consumer stopped early: free the slot now
+
+    async def _read_stream(self, prompt, response_schema, request_text: str, chunks: asyncio.Queue):
+        """Reads a streamed response into `chunks`, ending with _STREAM_END or the exception that interrupted it."""
+        text_chunks = []
+        try:
+            async with self._semaphore:
+                reserved_tokens = estimate_tokens(prompt)
+                await self.rate_limiter.aacquire(reserved_tokens)
+                response = await self.model.generate_content_async(prompt, generation_config=self._generation_config(response_schema), stream=True)
+                async for chunk in response:
+                    text_chunks.append(chunk.text)
+                    chunks.put_nowait(chunk.text)
+        except Exception as e:
+            print(f"Error streaming content: {e}")  # Log the error
+            chunks.put_nowait(e)
+            return
+        chunks.put_nowait(_STREAM_END)
+        self.rate_limiter.record_usage(reserved_tokens, self._total_tokens(response))
+        await asyncio.to_thread(self._store, request_text, "".join(text_chunks))
+
+    def count_tokens(self, prompt) -> int:
+        """Counts tokens with the Gemini tokenizer, falling back to the local estimate if the call fails."""
+        try:
+            return self.model.count_tokens(prompt).total_tokens
+        except Exception as e:
+            print(f"Error counting tokens: {e}")
+            return estimate_tokens(prompt)
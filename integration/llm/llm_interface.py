@@ -1 +1,44 @@
 # Purpose: Abstract interface for different LLMs
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterator
+from integration.llm.rate_limiter import estimate_tokens
+
+
+def request_fingerprint(prompt: str, response_schema: dict | None = None) -> str:
+    """Returns the text that identifies a request for caching and replay: the prompt plus its response schema, if any."""
+    if response_schema is None:
+        return prompt
+    return f"{prompt}\n\n[response_schema] {json.dumps(response_schema, sort_keys=True)}"
+
+
+class LLMInterface(ABC):
+    """Provider-agnostic LLM client. Every backend returns plain text, or None when the call fails.
+
+    `response_schema` (an OpenAPI-style dict) asks the backend for JSON constrained to that schema.
+    """
+
+    model_name: str
+
+    @abstractmethod
+    def generate_content(self, prompt: str, response_schema: dict | None = None) -> str | None:
+        """Generates the full response for `prompt`."""
+
+    @abstractmethod
+    async def agenerate_content(self, prompt: str, response_schema: dict | None = None) -> str | None:
+        """Async version of generate_content."""
+
+    @abstractmethod
+    def stream_content(self, prompt: str, response_schema: dict | None = None) -> Iterator[str]:
+        """Yields the response for `prompt` chunk by chunk. Raises if the response is interrupted midway."""
+
+    @abstractmethod
+    def astream_content(self, prompt: str, response_schema: dict | None = None) -> AsyncIterator[str]:
+        """Async version of stream_content."""
+
+    def invalidate(self, prompt: str, response_schema: dict | None = None):
+        """Forgets any stored response for this request so the next call reaches the model. No-op by default."""
+
+    def count_tokens(self, prompt: str) -> int:
+        """Returns the number of tokens `prompt` uses. Backends with a real tokenizer should override this."""
+        return estimate_tokens(prompt)
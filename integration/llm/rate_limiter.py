@@ -0,0 +1,95 @@
+# integration/llm/rate_limiter.py
+# Purpose: Proactive, process-wide rate limiting for LLM calls (requests-per-minute and tokens-per-minute).
+import time
+import asyncio
+import threading
+from config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (CHARS_PER_TOKEN characters per token), good enough for quota accounting."""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations; the level may go negative, which is the callers' wait debt."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.level = min(self.capacity, self.level + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` from the bucket and returns how many seconds the caller must wait before using it."""
+        self._refill(now)
+        # A single request bigger than the bucket could never be served; cap it at a full bucket
+        self.level -= min(amount, self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.refill_per_second
+
+    def adjust(self, amount: float, now: float):
+        """Corrects an earlier reservation once the real cost is known (positive = consumed more than reserved)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """Combines a requests-per-minute bucket and a tokens-per-minute bucket.
+
+    Reservations are made immediately under a lock, so concurrent callers queue in arrival order
+    and sleep exactly until their slot instead of failing with 429 and backing off.
+    """
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self._lock = threading.Lock()
+
+    def _reserve(self, token_count: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            request_wait = self.requests.reserve(1, now)
+            token_wait = self.tokens.reserve(token_count, now)
+            return max(request_wait, token_wait)
+
+    def acquire(self, token_count: int) -> float:
+        """Blocks until a request of `token_count` tokens may be sent. Returns the time waited."""
+        wait = self._reserve(token_count)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, token_count: int) -> float:
+        """Async version of acquire; waits without blocking the event loop."""
+        wait = self._reserve(token_count)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_usage(self, reserved_tokens: int, actual_tokens: int | None):
+        """Charges the difference between the estimated and the real token usage reported by the model."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.adjust(actual_tokens - reserved_tokens, time.monotonic())
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter shared by every LLM client."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
@@ -0,0 +1,31 @@
+# integration/llm/registry.py
+# Purpose: Process-wide registry of LLM clients so every module shares one lazily created client per model.
+import threading
+from config import LLM_MODEL_NAME, LLM_BACKEND
+from integration.llm.llm_interface import LLMInterface
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _create_client(model_name: str) -> LLMInterface:
+    """Builds a client for the backend selected by LLM_BACKEND."""
+    if LLM_BACKEND == "replay":
+        from integration.llm.replay_api import ReplayAPI
+        return ReplayAPI(model_name=model_name)
+    if LLM_BACKEND == "gemini":
+        from integration.llm.gemini_api import GeminiAPI
+        return GeminiAPI(model_name=model_name)
+    raise ValueError(f"Unknown LLM_BACKEND '{LLM_BACKEND}'. Expected 'gemini' or 'replay'.")
+
+def get_llm_client(model_name: str = LLM_MODEL_NAME) -> LLMInterface:
+    """Returns the shared client for `model_name`, creating it on first use.
+
+    Nothing is configured at import time, so importing a module that calls this
+    doesn't require GEMINI_API_KEY until a request is actually made.
+    """
+    with _clients_lock:
+        client = _clients.get(model_name)
+        if client is None:
+            client = _create_client(model_name)
+            _clients[model_name] = client
+        return client
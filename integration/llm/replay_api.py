@@ -0,0 +1,93 @@
+# integration/llm/replay_api.py
+# Purpose: Offline, deterministic LLM backend that serves recorded responses from disk (load tests, local runs without quota).
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator
+from config import LLM_MODEL_NAME, LLM_REPLAY_DIR, LLM_REPLAY_LATENCY_SECONDS
+from integration.llm.llm_interface import LLMInterface, request_fingerprint
+from integration.llm.response_cache import ResponseCache
+
+REPLAY_CHUNK_SIZE = 256  # Characters per chunk when replaying a response as a stream
+
+
+def recording_key(model_name: str, prompt: str) -> str:
+    """Recordings are named with the same content address the response cache uses."""
+    return ResponseCache.make_key(model_name, prompt)
+
+def record_response(replay_dir: str, model_name: str, prompt: str, response: str):
+    """Writes a response to `replay_dir` so ReplayAPI can serve it later."""
+    try:
+        os.makedirs(replay_dir, exist_ok=True)
+        path = os.path.join(replay_dir, f"{recording_key(model_name, prompt)}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": model_name, "prompt": prompt, "response": response}, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Error recording LLM response: {e}")
+
+
+class ReplayAPI(LLMInterface):
+    """Serves responses previously recorded by GeminiAPI (LLM_RECORD_DIR) instead of calling a model.
+
+    Lookups are exact: the same model name and fully formatted prompt always return the same response,
+    and an unrecorded prompt returns None just like a failed model call. `latency_seconds` adds a fixed
+    simulated delay so the pipeline's own overhead can be measured with or without model latency.
+    """
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, replay_dir: str = LLM_REPLAY_DIR, latency_seconds: float = LLM_REPLAY_LATENCY_SECONDS):
+        self.model_name = model_name
+        self.replay_dir = replay_dir
+        self.latency_seconds = latency_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self, prompt: str, response_schema: dict | None = None) -> str | None:
+        request_text = request_fingerprint(prompt, response_schema)
+        path = os.path.join(self.replay_dir, f"{recording_key(self.model_name, request_text)}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)["response"]
+        except FileNotFoundError:
+            print(f"No recorded response for prompt (key {os.path.basename(path)})")
+            response = None
+        except Exception as e:
+            print(f"Error loading recorded response {path}: {e}")
+            response = None
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def generate_content(self, prompt, response_schema=None):
+        """Returns the recorded response for `prompt`, or None if there is none."""
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._load(prompt, response_schema)
+
+    async def agenerate_content(self, prompt, response_schema=None):
+        """Async version of generate_content."""
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return await asyncio.to_thread(self._load, prompt, response_schema)
+
+    def stream_content(self, prompt, response_schema=None) -> Iterator[str]:
+        """Yields the recorded response in fixed-size chunks."""
+        response = self.generate_content(prompt, response_schema)
+        if not response:
+            return
+        for start in range(0, len(response), REPLAY_CHUNK_SIZE):
+            yield response[start:start + REPLAY_CHUNK_SIZE]
+
+    async def astream_content(self, prompt, response_schema=None) -> AsyncIterator[str]:
+        """Async version of stream_content."""
+        response = await self.agenerate_content(prompt, response_schema)
+        if not response:
+            return
+        for start in range(0, len(response), REPLAY_CHUNK_SIZE):
+            yield response[start:start + REPLAY_CHUNK_SIZE]
+            await asyncio.sleep(0)  # Let other tasks run between chunks, like a real stream would
@@ -0,0 +1,122 @@
+# integration/llm/response_cache.py
+# Purpose: Persistent, content-addressed cache for LLM responses so retries and duplicate submissions don't pay for a new call.
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with TTL expiry and LRU eviction.
+
+    Entries are keyed by the SHA-256 of the model name plus the fully formatted prompt.
+    """
+
+    def __init__(self, db_path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(db_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # One connection shared by every thread; all access goes through self._lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses (last_accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        """Returns the SHA-256 hex digest identifying a (model, prompt) pair."""
+        return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, prompt: str) -> str | None:
+        """Returns the cached response, or None on a miss or an expired entry."""
+        key = self.make_key(model_name, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, model_name: str, prompt: str, response: str):
+        """Stores a response and evicts expired and least recently used entries."""
+        key = self.make_key(model_name, prompt)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model_name, response, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, response, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, model_name: str, prompt: str):
+        """Removes a stored response, e.g. one that turned out to be unusable."""
+        key = self.make_key(model_name, prompt)
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drops expired entries, then the least recently used ones above max_entries. Caller holds the lock."""
+        self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current number of stored entries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache, creating it on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -0,0 +1,49 @@
+# tests/test_job_workers.py
+# A resume job whose Google Doc can't be created must be retried and, after its last attempt, dead-lettered.
+import sys
+import types
+import asyncio
+from agent.core import job_workers
+from agent.core.job_queue import SQLiteJobQueue, QUEUED, DEAD
+from agent.core.job_workers import JobWorkerPool, PROCESS_RESUME_JOB
+
+
+class DocsFailingOrchestrator:
+    """Stands in for ResumeFeedbackOrchestrator when create_google_doc keeps returning None."""
+    attempts = 0
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.state = {"stage": "initialized"}
+
+    async def process_raw_resume(self, pdf):
+        DocsFailingOrchestrator.attempts += 1
+        self.state["stage"] = "google_doc_failed"
+        return False
+
+
+def test_docs_failure_is_retried_then_dead_lettered(tmp_path, monkeypatch):
+    # execution pulls in the Firestore, GCS and LLM clients; the job only needs the orchestrator
+    monkeypatch.setitem(sys.modules, "agent.core.execution", types.SimpleNamespace(ResumeFeedbackOrchestrator=DocsFailingOrchestrator))
+    queue = SQLiteJobQueue(db_path=str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+    monkeypatch.setattr(job_workers, "get_job_queue", lambda: queue)
+    monkeypatch.setattr(job_workers, "retry_delay", lambda attempts: 0)
+    cleaned_up = []
+    monkeypatch.setitem(job_workers.JOB_HANDLERS, PROCESS_RESUME_JOB, (job_workers.process_resume_job, cleaned_up.append))
+
+    pdf_path = tmp_path / "resume.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    job_id = queue.enqueue(PROCESS_RESUME_JOB, {"user_id": "user-1", "pdf_path": str(pdf_path)})
+    pool = JobWorkerPool(concurrency=1)
+
+    asyncio.run(pool._run(queue.claim()))
+    assert queue.stats()[QUEUED] == 1  # First failure: back in the queue for a retry
+
+    asyncio.run(pool._run(queue.claim()))
+    assert queue.stats()[DEAD] == 1
+    dead = queue.dead_letters()
+    assert [job.id for job in dead] == [job_id]
+    assert "google_doc_failed" in dead[0].last_error
+    assert DocsFailingOrchestrator.attempts == 2
+    assert cleaned_up == []  # The spooled PDF is kept so the dead-lettered job can be requeued
+    assert pdf_path.exists()
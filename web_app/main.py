@@ -1,9 +1,13 @@
 # Purpose: Initialize the FastAPI application and include routers.
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles # Import StaticFiles
 from fastapi.templating import Jinja2Templates # Import Jinja2Templates
 from web_app.routers import resume, ui_auth, hr_auth # Import routers
 import config
+from agent.tools.pdf_extraction_service import shutdown_pdf_extraction_service
+from agent.core.job_workers import start_job_workers, stop_job_workers
+from agent.memory.user_db.doc_cache import request_scope
 
 # --- Setup for Templates and Static Files ---
 # Make sure these paths are correct relative to where you run the app
@@ -11,10 +15,37 @@ templates = Jinja2Templates(directory="web_app/templates")
 static_files_path = "web_app/static"
 
 async def startup_event():
-    """Load prompts during FastAPI startup."""
+    """Load prompts and start the resume processing workers during FastAPI startup."""
     config.load_all_prompts()
+    if config.JOB_WORKERS_IN_WEB_PROCESS:
+        await start_job_workers()
 
-app = FastAPI(title="CV Agent API", on_startup=[startup_event]) # Use this if you need startup events
+async def shutdown_event():
+    """Stop the job workers (unfinished jobs are picked up again after restart) and the PDF extraction worker processes."""
+    await stop_job_workers()
+    shutdown_pdf_extraction_service()
+
+app = FastAPI(title="CV Agent API", on_startup=[startup_event], on_shutdown=[shutdown_event]) # Use this if you need startup events
+
+UPLOAD_FORM_OVERHEAD_BYTES = 1024 * 1024  # Room for the other form fields and multipart boundaries
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Rejects uploads whose declared size is over the limit before the multipart body is read."""
+    content_length = request.headers.get("content-length")
+    if (
+        request.headers.get("content-type", "").startswith("multipart/form-data")
+        and content_length and content_length.isdigit()
+        and int(content_length) > config.MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES
+    ):
+        return PlainTextResponse(f"El archivo supera el tamaño máximo de {config.MAX_UPLOAD_BYTES // (1024 * 1024)} MB.", status_code=413)
+    return await call_next(request)
+
+@app.middleware("http")
+async def memoize_documents_per_request(request: Request, call_next):
+    """Each Firestore document is read at most once per request."""
+    with request_scope():
+        return await call_next(request)
 
 # Mount static files directory
 app.mount("/static", StaticFiles(directory=static_files_path), name="static")
@@ -22,6 +53,7 @@ app.mount("/static", StaticFiles(directory=static_files_path), name="static")
 # Include routers here if you use them
 app.include_router(ui_auth.router)
 app.include_router(hr_auth.router)
+app.include_router(resume.router)
 
 # --- End Setup ---
 
@@ -1,10 +1,11 @@
+import asyncio
 from fastapi import APIRouter, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_303_SEE_OTHER, HTTP_401_UNAUTHORIZED
 from agent.memory.user_db.users import check_hr_user_exists, get_hr_user_by_email, get_hr_review_data
 from agent.tools.pwd.pwd_processing import verify_password
-from agent.memory.user_db.users import get_pending_resumes
+from agent.memory.user_db.users import get_pending_resumes, get_review_queue_counts, set_review_status
 
 router = APIRouter(
     tags=["HR Authentication"]
@@ -47,8 +48,8 @@ async def handle_hr_login(request: Request, email: str = Form(...), password: st
 
 
 @router.get("/hr/dashboard", response_class=HTMLResponse, name="get_hr_dashboard_page")
-async def get_hr_dashboard_page(request: Request):
-    """Renders the HR dashboard with the resume review queue."""
+async def get_hr_dashboard_page(request: Request, cursor: str | None = None):
+    """Renders the HR dashboard with the resume review queue, one page at a time (`cursor` comes from the previous page)."""
     hr_session = request.cookies.get("hr_session")
     if hr_session != "logged_in":  
         return RedirectResponse(
@@ -58,13 +59,15 @@ async def get_hr_dashboard_page(request: Request):
     
     # Fetch the resume list
     try:
-        resume_list = await get_pending_resumes()
+        (resume_list, next_cursor), status_counts = await asyncio.gather(get_pending_resumes(cursor), get_review_queue_counts())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Página no válida")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error fetching resume queue")
     
     return templates.TemplateResponse(
         "hr_dashboard.html",
-        {"request": request, "resumes": resume_list}
+        {"request": request, "resumes": resume_list, "status_counts": status_counts, "next_cursor": next_cursor, "is_first_page": not cursor}
     )
 
 @router.get("/hr/review/{user_uuid}/{resume_id}", response_class=HTMLResponse, name="get_hr_review_page")
@@ -95,11 +98,8 @@ async def complete_review(request: Request, user_uuid: str, resume_id: str):
            status_code=HTTP_303_SEE_OTHER
        )
    
-   # Update resume status
-   hr_feedback_ref = db.collection("resumes").document(resume_id)
-   await hr_feedback_ref.update({
-       "metadata.status": "notificacion_pendiente"
-   })
+   # Update resume status (this also takes it out of the review queue)
+   await set_review_status(resume_id, "notificacion_pendiente")
    
    return RedirectResponse(
        url=request.url_for("get_hr_dashboard_page"),
@@ -1,19 +1,84 @@
 # Purpose: Define API endpoints for resume processing (upload, triggering Drive processing, etc.). This replaces the interactive input() logic from your current main.py.
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks
-# Import your agent's execution logic (we'll define this later)
-# from agent.core.execution import trigger_resume_processing_from_file, trigger_resume_processing_from_drive
+import uuid
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from agent.core.job_queue import get_job_queue, QUEUED, RUNNING, DONE, DEAD
+from agent.core.job_workers import PROCESS_DRIVE_RESUME_JOB
+from config import MAX_UPLOAD_BYTES, JOB_QUEUE_MAX_PENDING
 
-# Define UPLOAD_DIR here as well if needed, or import from a central config
+PDF_MIME_TYPE = "application/pdf"
 
-router = APIRouter()
+def require_hr_session(request: Request):
+    """Drive batches are started and followed by HR only (same session cookie as the HR pages)."""
+    if request.cookies.get("hr_session") != "logged_in":
+        raise HTTPException(status_code=401, detail="Inicia sesión como HR para usar este endpoint.")
+
+router = APIRouter(
+    tags=["Resume processing"],
+    dependencies=[Depends(require_hr_session)],
+)
+
+def _list_folder_pdfs(drive_folder_path: str | None, drive_folder_id: str | None) -> tuple[str | None, list[dict]]:
+    """Resolves the folder and lists every PDF in it, following all result pages."""
+    from integration.google.drive_api import get_folder_id, iter_files_in_folder
+    folder_id = drive_folder_id or get_folder_id(drive_folder_path)
+    if not folder_id:
+        return None, []
+    return folder_id, list(iter_files_in_folder(folder_id, mime_type=PDF_MIME_TYPE))
 
 @router.post("/trigger/drive/")
-async def trigger_drive_processing(background_tasks: BackgroundTasks, drive_folder_path: str):
-    # Trigger background processing for Drive
-    # background_tasks.add_task(trigger_resume_processing_from_drive, drive_folder_path)
-    return {"message": f"Processing triggered for Drive folder: {drive_folder_path}"}
-    
-# Add more endpoints as needed (e.g., get status, get results)
+async def trigger_drive_processing(drive_folder_path: str | None = None, drive_folder_id: str | None = None):
+    """Queues every PDF in a Drive folder for processing. Workers download and process them in parallel;
+    follow the progress with GET /trigger/drive/{batch_id}. Folders shared with the service account can be given by id."""
+    if not drive_folder_path and not drive_folder_id:
+        raise HTTPException(status_code=400, detail="Indica drive_folder_path o drive_folder_id.")
+    try:
+        folder_id, files = await asyncio.to_thread(_list_folder_pdfs, drive_folder_path, drive_folder_id)
+    except Exception as e:
+        print(f"Error listando la carpeta de Drive {drive_folder_path or drive_folder_id}: {e}")
+        raise HTTPException(status_code=502, detail=f"No se pudo leer la carpeta de Drive: {e}")
+    if not folder_id:
+        raise HTTPException(status_code=404, detail=f"No se encontró la carpeta de Drive: {drive_folder_path}")
+
+    accepted = [file for file in files if int(file.get("size") or 0) <= MAX_UPLOAD_BYTES]
+    skipped = [file["name"] for file in files if file not in accepted]
+
+    queue = get_job_queue()
+    pending = (await asyncio.to_thread(queue.stats))[QUEUED]
+    if pending + len(accepted) > JOB_QUEUE_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail=f"La cola tiene {pending} CVs pendientes; el lote de {len(accepted)} superaría el máximo de {JOB_QUEUE_MAX_PENDING}. Intenta de nuevo más tarde.",
+        )
+
+    batch_id = str(uuid.uuid4())
+    for file in accepted:
+        payload = {"file_id": file["id"], "file_name": file["name"], "batch_id": batch_id}
+        await asyncio.to_thread(queue.enqueue, PROCESS_DRIVE_RESUME_JOB, payload, None, f"{batch_id}_{file['id']}", batch_id)
+    print(f"📁 Lote {batch_id}: {len(accepted)} CVs en cola desde la carpeta de Drive {drive_folder_path or folder_id}")
 
+    return {
+        "message": f"Processing triggered for Drive folder: {drive_folder_path or folder_id}",
+        "batch_id": batch_id,
+        "queued": len(accepted),
+        "skipped_too_large": skipped,
+    }
 
-# Note: You'll need functions like trigger_resume_processing_from_file and trigger_resume_processing_from_drive in your agent/core/execution.py which this router will call. Using BackgroundTasks is crucial for long-running processes like LLM calls.
\ No newline at end of file
+@router.get("/trigger/drive/{batch_id}")
+async def get_drive_batch_progress(batch_id: str):
+    """Progress of a Drive batch: jobs per status and the share that finished (processed or dead-lettered)."""
+    counts = await asyncio.to_thread(get_job_queue().stats, batch_id)
+    total = sum(counts.values())
+    if not total:
+        raise HTTPException(status_code=404, detail=f"Lote no encontrado: {batch_id}")
+    finished = counts[DONE] + counts[DEAD]
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "queued": counts[QUEUED],
+        "running": counts[RUNNING],
+        "done": counts[DONE],
+        "failed": counts[DEAD],
+        "progress": round(finished / total, 3),
+        "finished": finished == total,
+    }
@@ -1,14 +1,17 @@
 # cvagent-aura/web_app/routers/ui_auth.py
 
-from fastapi import APIRouter, Request, Form, Depends, File, UploadFile, HTTPException, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, Request, Form, Depends, File, UploadFile, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_303_SEE_OTHER, HTTP_400_BAD_REQUEST
 from agent.memory.user_db.users import check_user_exists, create_user
 from agent.tools.pwd.pwd_processing import get_password_hash, validate_password_complexity
 from agent.memory.user_db.users import add_hashed_pwd, get_uuid_by_email, add_resume_version
-from agent.core.execution import ResumeFeedbackOrchestrator
-from config import INDUSTRIES_DATA, user_metadata_template
+from agent.core.job_queue import get_job_queue, QUEUED
+from agent.core.job_workers import PROCESS_RESUME_JOB
+from agent.tools.file_upload import spool_upload, discard_spooled_upload
+from config import INDUSTRIES_DATA, JOB_QUEUE_MAX_PENDING, user_metadata_template
 
 # --- Router Setup ---
 templates = Jinja2Templates(directory="web_app/templates") # Define templates within this router file
@@ -127,17 +130,15 @@ async def handle_onboarding_submission(
         print(f"Error during onboarding: {e}")
         raise HTTPException(status_code=500, detail="Failed to process onboarding submission")
 
-async def process_resume_wrapper(pdf_bytes: bytes, user_uuid: str):
-    """Wrapper to handle errors in background processing"""
-    try:
-        orchestrator = ResumeFeedbackOrchestrator(user_uuid)
-        success = await orchestrator.process_raw_resume(pdf_bytes)
-        print(f"Processing {'succeeded' if success else 'failed'}")
-        return orchestrator.state
-    except Exception as e:
-        print(f"Background processing failed for user {user_uuid}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+async def enqueue_resume_processing(pdf_path: str, user_uuid: str) -> str:
+    """Queues the resume pipeline for a spooled upload. Raises HTTPException(503) when the queue is full."""
+    queue = get_job_queue()
+    pending = (await asyncio.to_thread(queue.stats))[QUEUED]
+    if pending >= JOB_QUEUE_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Estamos procesando muchos CVs en este momento. Intenta de nuevo en unos minutos.")
+    job_id = await asyncio.to_thread(queue.enqueue, PROCESS_RESUME_JOB, {"user_id": user_uuid, "pdf_path": pdf_path})
+    print(f"CV del usuario {user_uuid} en cola (job {job_id}, {pending + 1} pendientes)")
+    return job_id
 
 
 # --- Create Account Route ---
@@ -150,7 +151,6 @@ async def get_create_account_page(request: Request, uid: str | None = None, emai
 @router.post("/create-account", name="handle_create_account")
 async def handle_create_account_and_upload(
     request: Request,
-    background_tasks: BackgroundTasks, # <--- Add BackgroundTasks dependency
     email: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...),
@@ -194,12 +194,19 @@ async def handle_create_account_and_upload(
         if not file.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Solo archivos PDF son aceptados.")
         
-        pdf_bytes = await file.read() # Read file into memory
+        # Copied to a temporary file in chunks (size limit enforced while copying) instead of read into memory
+        pdf_path = await spool_upload(file)
+
+        # 4. Queue the processing; the job worker deletes the spooled file once it's done
+        try:
+            await enqueue_resume_processing(pdf_path, user_uuid)
+        except Exception:
+            # Not queued (queue full, database locked...): nothing else will ever delete the spooled file
+            discard_spooled_upload(pdf_path)
+            raise
 
-        # 4. Redirect to success page
+        # 5. Redirect to success page
         try:
-            # Process in background with error handling
-            background_tasks.add_task(process_resume_wrapper, pdf_bytes, user_uuid)
             completion_url = request.url_for('get_onboarding_complete_page')
             return RedirectResponse(url=str(completion_url), status_code=HTTP_303_SEE_OTHER)
         except Exception as redirect_error: